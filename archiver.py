@@ -0,0 +1,157 @@
+"""
+Background archival of settled transactions into transactions_archive.
+
+Rows in a terminal status older than min_age_days are moved in primary-key
+batches: a non-locking keyset scan picks the next batch of ids, then one short
+transaction copies them into the compressed archive table and deletes them
+from transactions. INSERT ... SELECT share-locks the copied rows, so a row
+can't change status between being archived and being deleted, and no lock is
+held for longer than one batch.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+# Statuses that no longer change once a payment is settled
+TERMINAL_STATUSES = ('success', 'failed', 'cancelled')
+
+ARCHIVE_COLUMNS = """
+    id, transaction_id, gateway, payment_mode, base_amount, fee_amount, total_amount,
+    status, gateway_transaction_id, gateway_response, created_at, updated_at
+"""
+
+_STATUS_PLACEHOLDERS = ", ".join(["%s"] * len(TERMINAL_STATUSES))
+
+# created_at < cutoff also prunes partitions newer than the cutoff
+SELECT_BATCH_SQL = f"""
+    SELECT id FROM transactions
+    WHERE id > %s AND created_at < %s AND status IN ({_STATUS_PLACEHOLDERS})
+    ORDER BY id
+    LIMIT %s
+"""
+
+
+def _batch_filter(ids: list) -> str:
+    return (f"id IN ({', '.join(['%s'] * len(ids))}) AND created_at < %s"
+            f" AND status IN ({_STATUS_PLACEHOLDERS})")
+
+
+class TransactionArchiver:
+    """
+    Moves settled transactions older than min_age_days to transactions_archive.
+
+    connection_factory is a context manager yielding a DictCursor connection
+    that commits on exit, such as main.get_db_connection.
+    """
+
+    def __init__(self, connection_factory: Callable, min_age_days: int = 90, batch_size: int = 1000,
+                 interval: float = 3600, pause: float = 0.05):
+        self.connection_factory = connection_factory
+        self.min_age_days = min_age_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pause = pause
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._runs = 0
+        self._batches = 0
+        self._archived = 0
+        self._errors = 0
+        self._last_error = None
+        self._last_run_at = None
+        self._last_run_ms = None
+
+    def archive_batch(self, after_id: int, cutoff: datetime) -> tuple[int, int]:
+        """Archive the next batch of ids above after_id; returns (rows moved, last id scanned)"""
+        params = (after_id, cutoff, *TERMINAL_STATUSES, self.batch_size)
+
+        with self.connection_factory() as connection:
+            cursor = connection.cursor()
+            cursor.execute(SELECT_BATCH_SQL, params)
+            ids = [row['id'] for row in cursor.fetchall()]
+            if not ids:
+                return 0, after_id
+            # The scan is a plain read, end its snapshot before the locking statements
+            connection.commit()
+
+            batch_params = (*ids, cutoff, *TERMINAL_STATUSES)
+            cursor.execute(f"""
+                INSERT IGNORE INTO transactions_archive ({ARCHIVE_COLUMNS})
+                SELECT {ARCHIVE_COLUMNS} FROM transactions
+                WHERE {_batch_filter(ids)}
+            """, batch_params)
+            cursor.execute(f"DELETE FROM transactions WHERE {_batch_filter(ids)}", batch_params)
+            moved = cursor.rowcount
+
+        return moved, ids[-1]
+
+    def run_once(self, now: datetime = None) -> int:
+        """Archive every eligible row; returns the number of rows moved"""
+        cutoff = (now or datetime.now()) - timedelta(days=self.min_age_days)
+        started = time.monotonic()
+        after_id = 0
+        total = 0
+
+        while not self._stop.is_set():
+            moved, last_id = self.archive_batch(after_id, cutoff)
+            if last_id == after_id:
+                break
+            after_id = last_id
+            total += moved
+            with self._lock:
+                self._batches += 1
+                self._archived += moved
+            # Give request traffic a turn at the locks between batches
+            self._stop.wait(self.pause)
+
+        with self._lock:
+            self._runs += 1
+            self._last_run_at = time.time()
+            self._last_run_ms = round((time.monotonic() - started) * 1000, 3)
+        return total
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                moved = self.run_once()
+                if moved:
+                    print(f"Archived {moved} transactions")
+            except Exception as e:
+                with self._lock:
+                    self._errors += 1
+                    self._last_error = str(e)
+                print(f"Error archiving transactions: {e}")
+
+    def start(self):
+        """Start the background archiver thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="transaction-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background archiver thread, letting the current batch finish"""
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout=30)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "min_age_days": self.min_age_days,
+                "batch_size": self.batch_size,
+                "runs": self._runs,
+                "batches": self._batches,
+                "archived": self._archived,
+                "errors": self._errors,
+                "last_error": self._last_error,
+                "last_run_at": self._last_run_at,
+                "last_run_ms": self._last_run_ms,
+            }
@@ -0,0 +1,307 @@
+"""
+Async database access for the request path.
+
+Handlers talk to one of two pools through the same awaitable interface
+(acquire/release, connection.cursor/commit/rollback, cursor.execute/fetch*):
+
+- ThreadedPool wraps the blocking pymysql ConnectionPool and runs each
+  statement on the threadpool ('sync' DB mode).
+- AsyncConnectionPool wraps an aiomysql pool so waiting on MySQL never
+  occupies a thread ('async' DB mode).
+"""
+
+import asyncio
+import time
+
+import pymysql
+from starlette.concurrency import run_in_threadpool
+
+from db_pool import ConnectionPool, PoolTimeoutError, WaitHistogram
+
+
+class ThreadedCursor:
+    """Awaitable facade over a buffered pymysql cursor"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> int:
+        return self._cursor.lastrowid
+
+    async def execute(self, query, args=None):
+        return await run_in_threadpool(self._cursor.execute, query, args)
+
+    async def executemany(self, query, args):
+        return await run_in_threadpool(self._cursor.executemany, query, args)
+
+    # Results are buffered client-side, so fetching does not block on I/O
+    async def fetchone(self):
+        return self._cursor.fetchone()
+
+    async def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+    async def close(self):
+        self._cursor.close()
+
+
+class ThreadedStreamingCursor(ThreadedCursor):
+    """Awaitable facade over an unbuffered pymysql cursor, whose fetches read from the socket"""
+
+    async def fetchone(self):
+        return await run_in_threadpool(self._cursor.fetchone)
+
+    async def fetchmany(self, size: int):
+        return await run_in_threadpool(self._cursor.fetchmany, size)
+
+    async def fetchall(self):
+        return await run_in_threadpool(self._cursor.fetchall)
+
+    async def close(self):
+        await run_in_threadpool(self._cursor.close)
+
+
+class ThreadedConnection:
+    """Awaitable facade over a pooled pymysql connection"""
+
+    def __init__(self, connection):
+        self.raw = connection
+
+    async def cursor(self) -> ThreadedCursor:
+        return ThreadedCursor(self.raw.cursor())
+
+    async def commit(self):
+        await run_in_threadpool(self.raw.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.raw.rollback)
+
+
+class AsyncObservedCursor:
+    """Awaitable cursor proxy calling observe(query, args, seconds, cursor) after every statement"""
+
+    def __init__(self, cursor, observe):
+        self._cursor = cursor
+        self._observe = observe
+
+    async def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.execute(query, args)
+        finally:
+            self._observe(query, args, time.perf_counter() - started, self._cursor)
+
+    async def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return await self._cursor.executemany(query, args)
+        finally:
+            self._observe(query, args, time.perf_counter() - started, self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class AsyncObservedConnection:
+    """Proxy for a connection from either pool whose cursors report each statement to observe"""
+
+    def __init__(self, connection, observe):
+        self.wrapped = connection
+        self.observe = observe
+
+    async def cursor(self, *args):
+        return AsyncObservedCursor(await self.wrapped.cursor(*args), self.observe)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+
+async def streaming_cursor(connection):
+    """
+    Unbuffered dict cursor on a connection from either pool. Rows stay on the
+    server until fetched, so the result set must be read to the end (or the
+    connection discarded) before the connection is reused.
+    """
+    if isinstance(connection, AsyncObservedConnection):
+        return AsyncObservedCursor(await streaming_cursor(connection.wrapped), connection.observe)
+    if isinstance(connection, ThreadedConnection):
+        return ThreadedStreamingCursor(connection.raw.cursor(pymysql.cursors.SSDictCursor))
+
+    import aiomysql
+    return await connection.cursor(aiomysql.SSDictCursor)
+
+
+class ThreadedPool:
+    """Awaitable interface to the blocking ConnectionPool"""
+
+    mode = "sync"
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    async def start(self):
+        await run_in_threadpool(self.pool.start)
+
+    async def close(self):
+        await run_in_threadpool(self.pool.close)
+
+    async def acquire(self) -> ThreadedConnection:
+        return ThreadedConnection(await run_in_threadpool(self.pool.acquire))
+
+    async def release(self, connection: ThreadedConnection, discard: bool = False):
+        # Releasing may close the connection, which writes to the socket
+        await run_in_threadpool(self.pool.release, connection.raw, discard)
+
+    def stats(self) -> dict:
+        return self.pool.stats()
+
+
+class AsyncConnectionPool:
+    """
+    aiomysql pool with the same limits and stats as ConnectionPool.
+
+    aiomysql recycles connections that sat idle longer than idle_timeout on
+    checkout; max_lifetime, the ping health check, the waiter cap and the wait
+    timeout are enforced here. Borrowers wait on a semaphore of max_size slots
+    rather than inside aiomysql, whose waiters are not woken when a discarded
+    connection is returned.
+    """
+
+    mode = "async"
+
+    def __init__(self, connect_kwargs: dict, min_size: int = 2, max_size: int = 20,
+                 max_lifetime: float = 1800, idle_timeout: float = 300,
+                 wait_timeout: float = 5.0, max_waiters: int = 100,
+                 ping_interval: float = 1.0, **_):
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.max_waiters = max_waiters
+        self.ping_interval = ping_interval
+
+        self._pool = None
+        self._slots = None
+        self._waiting = 0
+        self._total_acquired = 0
+        self._total_timeouts = 0
+        self._total_rejected = 0
+        self._total_closed = 0
+        self._wait_times = WaitHistogram()
+
+    async def start(self):
+        import aiomysql
+
+        if self._pool is not None:
+            return
+        self._slots = asyncio.Semaphore(self.max_size)
+        self._pool = await aiomysql.create_pool(
+            minsize=self.min_size,
+            maxsize=self.max_size,
+            pool_recycle=self.idle_timeout,
+            cursorclass=aiomysql.DictCursor,
+            **self.connect_kwargs
+        )
+
+    async def close(self):
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            await pool.wait_closed()
+
+    async def _discard(self, connection):
+        self._total_closed += 1
+        connection.close()
+        await self._pool.release(connection)
+        self._slots.release()
+
+    async def acquire(self):
+        if self._pool is None:
+            raise PoolTimeoutError("Connection pool is closed")
+        if self._waiting >= self.max_waiters:
+            self._total_rejected += 1
+            raise PoolTimeoutError("Connection pool exhausted: too many waiting requests")
+
+        started = time.monotonic()
+        deadline = started + self.wait_timeout
+        self._waiting += 1
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._slots.acquire(), deadline - time.monotonic())
+                except asyncio.TimeoutError:
+                    self._total_timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.wait_timeout}s waiting for a database connection"
+                    )
+                # Holding a slot, aiomysql has a free connection or room to open one
+                try:
+                    connection = await self._pool.acquire()
+                except BaseException:
+                    self._slots.release()
+                    raise
+
+                now = time.monotonic()
+                if not hasattr(connection, '_pool_created_at'):
+                    connection._pool_created_at = now
+                    connection._pool_last_used = now
+                if now - connection._pool_created_at > self.max_lifetime:
+                    await self._discard(connection)
+                    continue
+                if now - connection._pool_last_used > self.ping_interval:
+                    try:
+                        await connection.ping(reconnect=False)
+                    except asyncio.CancelledError:
+                        self._total_closed += 1
+                        connection.close()
+                        self._pool.release(connection)
+                        self._slots.release()
+                        raise
+                    except Exception:
+                        await self._discard(connection)
+                        continue
+
+                connection._pool_last_used = now
+                self._total_acquired += 1
+                self._wait_times.record((now - started) * 1000)
+                return connection
+        finally:
+            self._waiting -= 1
+
+    async def release(self, connection, discard: bool = False):
+        if self._pool is None:
+            connection.close()
+            return
+        if discard or connection.closed:
+            await self._discard(connection)
+            return
+        connection._pool_last_used = time.monotonic()
+        await self._pool.release(connection)
+        self._slots.release()
+
+    def stats(self) -> dict:
+        size = self._pool.size if self._pool is not None else 0
+        idle = self._pool.freesize if self._pool is not None else 0
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": self._waiting,
+            "total_acquired": self._total_acquired,
+            "total_timeouts": self._total_timeouts,
+            "total_rejected": self._total_rejected,
+            "total_closed": self._total_closed,
+            "wait_time_ms": self._wait_times.snapshot(),
+        }
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark settlement status updates: one transaction per update against UPDATE ... CASE chunks
+
+Seeds --count transactions tagged with a per-run prefix, applies a full set of
+status changes with each strategy, then deletes the seeded rows and takes
+their counts back out of the rollups. Needs the MySQL database from DB_CONFIG; run it against a
+scratch copy.
+
+Usage: python benchmarks/bench_bulk_status.py [--count 20000] [--chunk-sizes 100,500,2000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pymysql  # noqa: E402
+
+from async_db import ThreadedConnection  # noqa: E402
+from main import (  # noqa: E402
+    DB_CONFIG,
+    LOCK_TRANSACTION_SQL,
+    TransactionRequest,
+    TransactionStatusUpdate,
+    apply_status_chunk,
+    insert_transaction_chunk,
+)
+from pricing_config import DEFAULT_PAYMENT_METHODS  # noqa: E402
+from rollups import RollupDeltas  # noqa: E402
+
+SEED_CHUNK_SIZE = 1000
+
+
+async def seed(connection, cursor, prefix: str, count: int, rng: random.Random) -> list[str]:
+    transaction_ids = [f"{prefix}-{i:07d}" for i in range(count)]
+    for start in range(0, count, SEED_CHUNK_SIZE):
+        chunk = []
+        for index, transaction_id in enumerate(transaction_ids[start:start + SEED_CHUNK_SIZE]):
+            gateway, payment_mode = rng.choice(DEFAULT_PAYMENT_METHODS)
+            amount = Decimal(rng.randint(100, 10_000_000)).scaleb(-2)
+            chunk.append((index, TransactionRequest(
+                transaction_id=transaction_id, gateway=gateway, payment_mode=payment_mode,
+                base_amount=amount, fee_amount=Decimal(0), total_amount=amount
+            )))
+        await insert_transaction_chunk(cursor, chunk)
+        await connection.commit()
+    return transaction_ids
+
+
+async def update_one_by_one(connection, cursor, updates: list[TransactionStatusUpdate]):
+    """The statements PUT /api/transactions/{id} runs, one database transaction per update"""
+    for update in updates:
+        await cursor.execute(LOCK_TRANSACTION_SQL, (update.transaction_id,))
+        current = await cursor.fetchone()
+        await cursor.execute("""
+            UPDATE transactions
+            SET status = %s, gateway_transaction_id = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE transaction_id = %s AND created_at = %s
+        """, (update.status, update.gateway_transaction_id, update.transaction_id, current['created_at']))
+        deltas = RollupDeltas()
+        deltas.status_change(current['gateway'], current['payment_mode'], current['created_at'],
+                             current['status'], update.status)
+        await deltas.apply(cursor)
+        await connection.commit()
+
+
+async def update_in_chunks(connection, cursor, updates: list[TransactionStatusUpdate], chunk_size: int):
+    """The statements POST /api/transactions/bulk-status runs"""
+    for start in range(0, len(updates), chunk_size):
+        await apply_status_chunk(cursor, updates[start:start + chunk_size])
+        await connection.commit()
+
+
+async def timed(label: str, count: int, coroutine):
+    started = time.perf_counter()
+    await coroutine
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed:8.3f}s  {count / elapsed:10.0f} updates/s  {elapsed / count * 1e6:8.1f} µs/update")
+
+
+async def run(args) -> int:
+    rng = random.Random(args.seed)
+    prefix = f"bench-{uuid.uuid4().hex[:8]}"
+    chunk_sizes = [int(size) for size in args.chunk_sizes.split(",")]
+
+    raw = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, autocommit=False, **DB_CONFIG)
+    connection = ThreadedConnection(raw)
+    cursor = await connection.cursor()
+
+    try:
+        print(f"Seeding {args.count:,} transactions ({prefix})")
+        transaction_ids = await seed(connection, cursor, prefix, args.count, rng)
+        print()
+
+        # Every run flips every row so each strategy changes the same number of statuses
+        statuses = ["success", "failed"]
+        runs = [("one transaction per update", None)] + [(f"UPDATE ... CASE, chunks of {size}", size)
+                                                          for size in chunk_sizes]
+        for run_number, (label, chunk_size) in enumerate(runs):
+            status = statuses[run_number % 2]
+            updates = [TransactionStatusUpdate(transaction_id=transaction_id, status=status,
+                                               gateway_transaction_id=f"gw-{transaction_id}")
+                       for transaction_id in transaction_ids]
+            if chunk_size is None:
+                await timed(label, len(updates), update_one_by_one(connection, cursor, updates))
+            else:
+                await timed(label, len(updates), update_in_chunks(connection, cursor, updates, chunk_size))
+    finally:
+        # Subtract exactly the seeded rows from the rollups; rebuilding them would
+        # lose archived rows' counts and race with other writers
+        await connection.rollback()
+        await cursor.execute("""
+            SELECT gateway, payment_mode, status, created_at FROM transactions
+            WHERE transaction_id LIKE %s FOR UPDATE
+        """, (prefix + "-%",))
+        deltas = RollupDeltas()
+        for row in await cursor.fetchall():
+            deltas.delete(row['gateway'], row['payment_mode'], row['status'], row['created_at'])
+        await cursor.execute("DELETE FROM transactions WHERE transaction_id LIKE %s", (prefix + "-%",))
+        await cursor.execute("DELETE FROM transaction_ids WHERE transaction_id LIKE %s", (prefix + "-%",))
+        await deltas.apply(cursor)
+        await connection.commit()
+        raw.close()
+
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=20_000, help="number of transactions to update")
+    parser.add_argument("--chunk-sizes", default="100,500,2000", help="comma-separated bulk chunk sizes")
+    parser.add_argument("--seed", type=int, default=42)
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled fee engine against the original per-call calculate_fee
+
+Usage: python benchmarks/bench_fees.py [--count 2000000] [--seed 42]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from fee_engine import DEFAULT_FEE_SCHEDULES, FeeEngine  # noqa: E402
+from money import to_paise  # noqa: E402
+
+
+def legacy_calculate_fee(amount: float, payment_mode: str) -> tuple[float, float, float]:
+    """The original calculate_fee, which rebuilt its tier table on every call"""
+
+    fee_configs = {
+        "debit_card": {
+            "ranges": [
+                (0, 2000, 0.0),
+                (2000.01, float('inf'), 0.5)
+            ]
+        },
+        "credit_card": {
+            "ranges": [
+                (0, 25000, 0.1),
+                (25000.01, float('inf'), 0.5)
+            ]
+        },
+        "netbanking": {
+            "ranges": [
+                (0, 10000, 0.0),
+                (10000.01, 50000, 0.75),
+                (50000.01, float('inf'), 1.0)
+            ]
+        },
+        "upi": {
+            "ranges": [
+                (0, float('inf'), 0.0)
+            ]
+        }
+    }
+
+    config = fee_configs.get(payment_mode, fee_configs["upi"])
+
+    fee_percentage = 0.0
+    for min_amount, max_amount, percentage in config["ranges"]:
+        if min_amount <= amount <= max_amount:
+            fee_percentage = percentage
+            break
+
+    fee_amount = (amount * fee_percentage) / 100
+    total_amount = amount + fee_amount
+
+    return fee_amount, total_amount, fee_percentage
+
+
+def timed(label: str, count: int, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed:8.3f}s  {count / elapsed / 1e6:8.2f}M ops/s  {elapsed / count * 1e9:8.1f} ns/op")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=2_000_000, help="number of amounts to price")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    modes = list(DEFAULT_FEE_SCHEDULES)
+    # Whole paise amounts up to ₹1,00,000 so every tier is exercised
+    amounts_paise = [rng.randint(100, 10_000_000) for _ in range(args.count)]
+    amounts = [paise / 100 for paise in amounts_paise]
+    amount_modes = [rng.choice(modes) for _ in range(args.count)]
+
+    engine = FeeEngine(DEFAULT_FEE_SCHEDULES)
+    calculate = engine.calculate
+
+    print(f"Pricing {args.count:,} amounts across {len(modes)} payment modes\n")
+
+    legacy = timed("legacy calculate_fee", args.count,
+                   lambda: [legacy_calculate_fee(a, m) for a, m in zip(amounts, amount_modes)])
+    single = timed("FeeEngine.calculate", args.count,
+                   lambda: [calculate(a, m) for a, m in zip(amounts_paise, amount_modes)])
+    fees, totals, percentages = timed("FeeEngine.calculate_fees", args.count,
+                                      lambda: engine.calculate_fees(amounts_paise, amount_modes))
+    timed("FeeEngine.calculate_fees (1 mode)", args.count,
+          lambda: engine.calculate_fees(amounts_paise, "netbanking"))
+
+    # Sanity check: the batch API matches the single-amount API exactly, and the
+    # legacy float fee rounded to the paisa is never more than a paisa away
+    # (the engine rounds half-paise fees up where float rounding may go down);
+    # both return the tier's configured percentage
+    batch = list(zip(fees, totals, percentages))
+    mismatches = sum(1 for new, vec in zip(single, batch) if new != vec)
+    rounding_differences = 0
+    for old, new in zip(legacy, single):
+        difference = abs(to_paise(round(old[0], 2)) - new[0])
+        if difference > 1 or old[2] != new[2]:
+            mismatches += 1
+        elif difference:
+            rounding_differences += 1
+    print(f"\nMismatched results: {mismatches}")
+    print(f"Half-paisa rounding differences from legacy: {rounding_differences}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Open-loop load test of the API with a configurable endpoint mix
+
+Requests are started on a fixed schedule at --rps regardless of how fast the
+server answers, over up to --clients concurrent connections. Latency is
+measured from each request's scheduled start, so time spent queued behind a
+slow server counts (no coordinated omission). Results per endpoint
+(throughput, p50/p95/p99/p999 of 2xx responses, errors counting every other
+response) are printed and written as JSON; pass --compare with an earlier
+result file to fail on latency regressions.
+
+The server must already be running (python main.py). --seed-rows first fills
+the database from DB_CONFIG with that many synthetic transactions using
+generate_data.py; add --existing-prefix to reuse rows an earlier run (or
+generate_data.py itself) created under that prefix instead.
+
+Usage: python benchmarks/load_test.py [--url http://localhost:8000] [--rps 200] [--duration 60]
+                                      [--clients 64] [--mix checkout=30,create=15,update=10,get=30,list=10,success_rates=5]
+                                      [--seed-rows 1000000 [--existing-prefix syn]] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import generate_data  # noqa: E402
+from fee_engine import DEFAULT_FEE_SCHEDULES, FeeEngine  # noqa: E402
+from main import DB_CONFIG  # noqa: E402
+from money import to_rupees  # noqa: E402
+from pricing_config import DEFAULT_PAYMENT_METHODS  # noqa: E402
+
+DEFAULT_MIX = "checkout=30,create=15,update=10,get=30,list=10,success_rates=5"
+PERCENTILES = (50, 95, 99, 99.9)
+
+fee_engine = FeeEngine(DEFAULT_FEE_SCHEDULES)
+
+
+class TransactionIds:
+    """IDs the load test can read and update: the seeded range plus everything it created"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.seed_prefix = None
+        self.seeded = 0
+        self.created = []
+
+    def seeded_id(self, index: int) -> str:
+        return generate_data.transaction_id(self.seed_prefix, index)
+
+    def pick(self):
+        total = self.seeded + len(self.created)
+        if not total:
+            return None
+        index = self.rng.randrange(total)
+        return self.seeded_id(index) if index < self.seeded else self.created[index - self.seeded]
+
+
+def random_transaction(rng: random.Random, transaction_id: str) -> dict:
+    gateway, payment_mode = rng.choice(DEFAULT_PAYMENT_METHODS)
+    amount = rng.randint(100, 10_000_000)
+    fee, total, _ = fee_engine.calculate(amount, payment_mode)
+    return {
+        "transaction_id": transaction_id,
+        "gateway": gateway,
+        "payment_mode": payment_mode,
+        "base_amount": to_rupees(amount),
+        "fee_amount": to_rupees(fee),
+        "total_amount": to_rupees(total),
+    }
+
+
+# Each operation returns the request to send: (method, path, keyword arguments for httpx,
+# callback run after a 2xx response or None)
+def op_checkout(rng, ids):
+    return "POST", "/api/checkout", {"json": {"amount": to_rupees(rng.randint(100, 10_000_000))}}, None
+
+
+def op_create(rng, ids):
+    transaction_id = f"load-{uuid.uuid4().hex}"
+    # Only offered to get/update once the create has succeeded, so they never race it
+    return ("POST", "/api/transactions", {"json": random_transaction(rng, transaction_id)},
+            lambda: ids.created.append(transaction_id))
+
+
+def op_update(rng, ids):
+    transaction_id = ids.pick()
+    if transaction_id is None:
+        return op_create(rng, ids)
+    status = rng.choice(["success", "success", "success", "failed"])
+    return "PUT", f"/api/transactions/{transaction_id}", {"params": {"status": status}}, None
+
+
+def op_get(rng, ids):
+    transaction_id = ids.pick()
+    if transaction_id is None:
+        return op_create(rng, ids)
+    return "GET", f"/api/transactions/{transaction_id}", {}, None
+
+
+def op_list(rng, ids):
+    return "GET", "/api/transactions", {"params": {"limit": 50}}, None
+
+
+def op_success_rates(rng, ids):
+    return "GET", "/api/success-rates", {}, None
+
+
+OPERATIONS = {
+    "checkout": op_checkout,
+    "create": op_create,
+    "update": op_update,
+    "get": op_get,
+    "list": op_list,
+    "success_rates": op_success_rates,
+}
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r}; choose from {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], errors: int, status_codes: dict, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "status_codes": status_codes,
+    }
+    for pct in PERCENTILES:
+        value = percentile(latencies, pct)
+        summary[f"p{pct:g}".replace(".", "")] = round(value, 3) if value is not None else None
+    summary["max"] = round(latencies[-1], 3) if latencies else None
+    return summary
+
+
+async def seed(ids: TransactionIds, rows: int, seed: int, workers: int, existing_prefix: str = None):
+    """Point ids at rows synthetic transactions, generating them unless they already exist"""
+    if existing_prefix:
+        ids.seed_prefix, ids.seeded = existing_prefix, rows
+        print(f"Using {rows:,} existing transactions under prefix {existing_prefix!r}")
+        return
+
+    prefix = f"load-{uuid.uuid4().hex[:8]}"
+    print(f"Generating {rows:,} transactions under prefix {prefix!r}")
+    stats = await asyncio.to_thread(generate_data.generate, DB_CONFIG, rows, workers=workers, seed=seed, prefix=prefix)
+    ids.seed_prefix, ids.seeded = prefix, stats["rows"]
+    print(f"Seeded {stats['rows']:,} transactions in {stats['total_seconds']}s "
+          f"({stats['rows_per_second']:,} rows/s while loading)")
+
+
+async def run_load(client: httpx.AsyncClient, ids: TransactionIds, args, rng: random.Random) -> dict:
+    weights = parse_mix(args.mix)
+    names = list(weights)
+    loop = asyncio.get_running_loop()
+
+    # name -> [latencies in ms, errors, status code counts]
+    results = {name: [[], 0, {}] for name in names}
+    in_flight = set()
+    skipped = 0
+
+    async def execute(name: str, scheduled: float, record: bool):
+        method, path, kwargs, on_success = OPERATIONS[name](rng, ids)
+        try:
+            response = await client.request(method, path, **kwargs)
+            code = str(response.status_code)
+            # A 404 or 409 is answered fast; counting it as a sample would flatter the latencies
+            failed = not response.is_success
+            if not failed and on_success is not None:
+                on_success()
+        except httpx.HTTPError as e:
+            code = type(e).__name__
+            failed = True
+        if not record:
+            return
+        latency_ms = (loop.time() - scheduled) * 1000
+        entry = results[name]
+        entry[2][code] = entry[2].get(code, 0) + 1
+        if failed:
+            entry[1] += 1
+        else:
+            entry[0].append(latency_ms)
+
+    interval = 1 / args.rps
+    total = args.warmup + args.duration
+    start = loop.time()
+    measure_from = start + args.warmup
+    count = 0
+
+    while True:
+        scheduled = start + count * interval
+        if scheduled >= start + total:
+            break
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        count += 1
+
+        # Bound memory if the server falls far behind; these show up as skipped
+        if len(in_flight) >= args.max_in_flight:
+            skipped += 1
+            continue
+
+        name = rng.choices(names, weights=[weights[name] for name in names])[0]
+        task = asyncio.create_task(execute(name, scheduled, scheduled >= measure_from))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    elapsed = args.duration
+
+    endpoints = {name: summarize(latencies, errors, codes, elapsed)
+                 for name, (latencies, errors, codes) in results.items()}
+    all_latencies = [latency for latencies, _, _ in results.values() for latency in latencies]
+    all_codes = {}
+    for _, _, codes in results.values():
+        for code, number in codes.items():
+            all_codes[code] = all_codes.get(code, 0) + number
+    overall = summarize(all_latencies, sum(errors for _, errors, _ in results.values()), all_codes, elapsed)
+    overall["skipped"] = skipped
+
+    return {"overall": overall, "endpoints": endpoints}
+
+
+def print_results(results: dict):
+    header = f"{'endpoint':<16} {'requests':>9} {'errors':>7} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'p999':>9}"
+    print("\n" + header + "\n" + "-" * len(header))
+    rows = list(results["endpoints"].items()) + [("overall", results["overall"])]
+    for name, summary in rows:
+        cells = [f"{summary[key]:>9.2f}" if summary[key] is not None else f"{'-':>9}"
+                 for key in ("throughput_rps", "p50", "p95", "p99", "p999")]
+        print(f"{name:<16} {summary['requests']:>9} {summary['errors']:>7} {' '.join(cells)}")
+    print("(latencies in ms from scheduled start)")
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Endpoints whose p99 got more than threshold percent worse than the baseline"""
+    regressions = []
+    for name, summary in results["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before or not before.get("p99") or summary["p99"] is None:
+            continue
+        change = (summary["p99"] - before["p99"]) / before["p99"] * 100
+        if change > threshold:
+            regressions.append(f"{name}: p99 {before['p99']:.2f}ms -> {summary['p99']:.2f}ms (+{change:.0f}%)")
+    return regressions
+
+
+async def main_async(args) -> int:
+    rng = random.Random(args.seed)
+    ids = TransactionIds(rng)
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        if args.seed_rows:
+            await seed(ids, args.seed_rows, args.seed, args.seed_workers, args.existing_prefix)
+
+        print(f"Running {args.mix} at {args.rps} req/s for {args.duration}s "
+              f"(+{args.warmup}s warmup) over {args.clients} connections")
+        results = await run_load(client, ids, args, rng)
+
+    results["config"] = {
+        "url": args.url, "rps": args.rps, "duration": args.duration, "warmup": args.warmup,
+        "clients": args.clients, "mix": args.mix, "seed": args.seed, "seed_rows": args.seed_rows,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        if regressions:
+            return 1
+        print(f"✅ No p99 regressions over {args.threshold:g}% against {args.compare}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rps", type=float, default=200, help="target request rate")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds of load before measuring")
+    parser.add_argument("--clients", type=int, default=64, help="concurrent connections")
+    parser.add_argument("--max-in-flight", type=int, default=10_000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="comma-separated operation=weight")
+    parser.add_argument("--seed-rows", type=int, default=0, help="synthetic transactions to generate before the run")
+    parser.add_argument("--seed-workers", type=int, default=generate_data.GENERATOR_CONFIG['workers'])
+    parser.add_argument("--existing-prefix", help="reuse --seed-rows generated earlier under this prefix")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline results JSON to check for p99 regressions")
+    parser.add_argument("--threshold", type=float, default=10, help="allowed p99 regression in percent")
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN every hot-path query in main.py and fail if one needs a full table scan
+
+A query fails when MySQL plans a full scan (type ALL) of any table, whether or
+not an index exists for it: the optimizer ignoring an index is exactly the
+regression this guards against. The only exemption is a table the optimizer
+estimates at fewer than SMALL_TABLE_ROWS rows, where a scan is genuinely
+cheaper; that is reported as a warning, so run against realistic data (see
+generate_data.py) to get a binding result.
+
+Usage: python check_query_plans.py
+"""
+
+import sys
+
+import pymysql
+
+from main import (
+    DB_CONFIG,
+    GATEWAY_SUCCESS_RATES_SQL,
+    LOCK_TRANSACTION_SQL,
+    SELECT_ARCHIVED_TRANSACTION_SQL,
+    SELECT_TRANSACTION_SQL,
+    SUCCESS_RATES_SQL,
+    build_list_transactions_query,
+    build_success_rate_lookup,
+)
+from pricing_config import DEFAULT_PAYMENT_METHODS
+from rollups import window_start
+
+# Full scans of tables estimated below this many rows only warn
+SMALL_TABLE_ROWS = 1000
+
+
+def hot_path_queries() -> list[tuple[str, str, tuple]]:
+    """(name, sql, sample params) for every query on a request path"""
+    return [
+        ("get_transaction", SELECT_TRANSACTION_SQL, ("transaction_001",)),
+        ("lock_transaction", LOCK_TRANSACTION_SQL, ("transaction_001",)),
+        ("get_archived_transaction", SELECT_ARCHIVED_TRANSACTION_SQL, ("transaction_001",)),
+        ("list_transactions", *build_list_transactions_query(None, 50)),
+        ("list_transactions_by_status", *build_list_transactions_query("success", 50)),
+        ("list_recent_transactions", *build_list_transactions_query(None, 50, window_start(7))),
+        ("list_transactions_next_page", *build_list_transactions_query(None, 50, None, (window_start(1), 100))),
+        ("checkout_success_rates", *build_success_rate_lookup(DEFAULT_PAYMENT_METHODS, 30)),
+        ("success_rates", SUCCESS_RATES_SQL, (window_start(30),)),
+        ("gateway_success_rates", GATEWAY_SUCCESS_RATES_SQL, ("Razorpay", window_start(30))),
+    ]
+
+
+def check_plan(cursor, name: str, sql: str, params: tuple) -> tuple[list[str], list[str]]:
+    """Return (failures, warnings) for one query"""
+    cursor.execute("EXPLAIN " + sql, params)
+    failures = []
+    warnings = []
+
+    for row in cursor.fetchall():
+        extra = row.get('Extra') or ''
+        if row.get('type') == 'ALL':
+            detail = f"{name}: full scan of {row['table']} ({row.get('rows')} rows) {extra}".strip()
+            if row.get('possible_keys'):
+                detail += f" despite possible keys {row['possible_keys']}"
+            else:
+                detail += " with no usable index"
+            if (row.get('rows') or 0) < SMALL_TABLE_ROWS:
+                warnings.append(detail + f", allowed below {SMALL_TABLE_ROWS} rows")
+            else:
+                failures.append(detail)
+        elif 'Using filesort' in extra and 'ORDER BY' in sql and 'GROUP BY' not in sql:
+            warnings.append(f"{name}: sorts {row['table']} instead of reading an index in order")
+
+    return failures, warnings
+
+
+def main() -> int:
+    connection = pymysql.connect(cursorclass=pymysql.cursors.DictCursor, **DB_CONFIG)
+    failures = []
+
+    try:
+        with connection.cursor() as cursor:
+            for name, sql, params in hot_path_queries():
+                query_failures, query_warnings = check_plan(cursor, name, sql, params)
+                for warning in query_warnings:
+                    print(f"⚠️  {warning}")
+                for failure in query_failures:
+                    print(f"❌ {failure}")
+                if not query_failures and not query_warnings:
+                    print(f"✅ {name}")
+                failures.extend(query_failures)
+    finally:
+        connection.close()
+
+    if failures:
+        print(f"\n{len(failures)} hot-path queries regressed to full table scans")
+        return 1
+    print("\nAll hot-path queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
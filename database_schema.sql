@@ -6,13 +6,21 @@ CREATE DATABASE IF NOT EXISTS payment_orchestration;
 
 USE payment_orchestration;
 
--- Drop table if it exists (for clean setup)
+-- Drop tables if they exist (for clean setup)
+DROP TABLE IF EXISTS transaction_rollups;
+DROP TABLE IF EXISTS transaction_ids;
+DROP TABLE IF EXISTS transactions_archive;
 DROP TABLE IF EXISTS transactions;
 
--- Create transactions table
+-- Create transactions table, range partitioned by created_at.
+-- MySQL requires every unique key of a partitioned table to include the
+-- partitioning column, so transaction_id is only unique per created_at here
+-- and global uniqueness is enforced by transaction_ids below.
+-- Only p_history and p_future are created here: run partitions.py (cron) to
+-- split p_future into daily or monthly partitions and expire old ones
 CREATE TABLE transactions (
-    id INT AUTO_INCREMENT PRIMARY KEY,
-    transaction_id VARCHAR(100) UNIQUE NOT NULL,
+    id INT AUTO_INCREMENT,
+    transaction_id VARCHAR(100) NOT NULL,
     gateway VARCHAR(50) NOT NULL,
     payment_mode VARCHAR(50) NOT NULL,
     base_amount DECIMAL(10, 2) NOT NULL,
@@ -21,19 +29,26 @@ CREATE TABLE transactions (
     status VARCHAR(20) DEFAULT 'pending',
     gateway_transaction_id VARCHAR(200),
     gateway_response TEXT,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     
-    -- Indexes for performance
-    INDEX idx_transaction_id (transaction_id),
-    INDEX idx_status (status),
-    INDEX idx_gateway (gateway),
-    INDEX idx_payment_mode (payment_mode)
-) ENGINE=InnoDB;
+    PRIMARY KEY (id, created_at),
+    UNIQUE KEY uq_transaction_created (transaction_id, created_at),  -- point lookups, pruned via transaction_ids
+
+    -- Indexes for performance, see migrations/001_composite_indexes.sql.
+    -- InnoDB appends the primary key to every secondary index
+    INDEX idx_status_created (status, created_at),           -- list_transactions filtered by status
+    INDEX idx_created (created_at),                          -- list_transactions, newest first
+    INDEX idx_gateway_mode_created (gateway, payment_mode, created_at, status)  -- windowed success-rate scans and rollup rebuilds
+) ENGINE=InnoDB
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_history VALUES LESS THAN (UNIX_TIMESTAMP('2025-01-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
 
 -- Add comments to columns
 ALTER TABLE transactions MODIFY COLUMN id INT AUTO_INCREMENT COMMENT 'Primary key';
-ALTER TABLE transactions MODIFY COLUMN transaction_id VARCHAR(100) COMMENT 'Unique transaction identifier';
+ALTER TABLE transactions MODIFY COLUMN transaction_id VARCHAR(100) NOT NULL COMMENT 'Unique transaction identifier';
 ALTER TABLE transactions MODIFY COLUMN gateway VARCHAR(50) COMMENT 'Payment gateway: Razorpay, PayU, Cashfree';
 ALTER TABLE transactions MODIFY COLUMN payment_mode VARCHAR(50) COMMENT 'Payment mode: debit_card, credit_card, netbanking, upi';
 ALTER TABLE transactions MODIFY COLUMN base_amount DECIMAL(10, 2) COMMENT 'Original transaction amount';
@@ -42,8 +57,52 @@ ALTER TABLE transactions MODIFY COLUMN total_amount DECIMAL(10, 2) COMMENT 'Tota
 ALTER TABLE transactions MODIFY COLUMN status VARCHAR(20) COMMENT 'Transaction status: pending, success, failed, cancelled';
 ALTER TABLE transactions MODIFY COLUMN gateway_transaction_id VARCHAR(200) COMMENT 'Transaction ID from payment gateway';
 ALTER TABLE transactions MODIFY COLUMN gateway_response TEXT COMMENT 'Response from payment gateway';
-ALTER TABLE transactions MODIFY COLUMN created_at TIMESTAMP COMMENT 'Transaction creation timestamp';
-ALTER TABLE transactions MODIFY COLUMN updated_at TIMESTAMP COMMENT 'Transaction update timestamp';
+ALTER TABLE transactions MODIFY COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT 'Transaction creation timestamp, the partitioning key';
+ALTER TABLE transactions MODIFY COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Transaction update timestamp';
+
+-- Create the transaction ID registry: enforces global transaction_id uniqueness
+-- and records which created_at (and so which partition) each transaction lives in.
+-- Rows are kept when partitions expire so IDs are never reused
+CREATE TABLE transaction_ids (
+    transaction_id VARCHAR(100) NOT NULL PRIMARY KEY COMMENT 'Unique transaction identifier',
+    created_at TIMESTAMP NOT NULL COMMENT 'created_at of the transactions row'
+) ENGINE=InnoDB;
+
+-- Create the archive for settled transactions, filled by archiver.py and by
+-- partitions.py when it expires a partition. Rows are read only by
+-- transaction_id lookups that miss transactions, so they are stored compressed
+CREATE TABLE transactions_archive (
+    id INT NOT NULL COMMENT 'id the row had in transactions',
+    transaction_id VARCHAR(100) NOT NULL PRIMARY KEY COMMENT 'Unique transaction identifier',
+    gateway VARCHAR(50) NOT NULL,
+    payment_mode VARCHAR(50) NOT NULL,
+    base_amount DECIMAL(10, 2) NOT NULL,
+    fee_amount DECIMAL(10, 2) NOT NULL,
+    total_amount DECIMAL(10, 2) NOT NULL,
+    status VARCHAR(20),
+    gateway_transaction_id VARCHAR(200),
+    gateway_response TEXT,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8;
+
+-- Create hourly success-rate rollups, maintained by the application on every
+-- insert and status change so success-rate reads never rescan transactions
+CREATE TABLE transaction_rollups (
+    gateway VARCHAR(50) NOT NULL COMMENT 'Payment gateway',
+    payment_mode VARCHAR(50) NOT NULL COMMENT 'Payment mode',
+    bucket_hour DATETIME NOT NULL COMMENT 'Start of the hour the transactions were created in',
+    total_transactions INT NOT NULL DEFAULT 0,
+    successful_transactions INT NOT NULL DEFAULT 0,
+    failed_transactions INT NOT NULL DEFAULT 0,
+    pending_transactions INT NOT NULL DEFAULT 0,
+    last_transaction TIMESTAMP NULL COMMENT 'Latest created_at counted in this bucket',
+
+    PRIMARY KEY (gateway, payment_mode, bucket_hour),    -- checkout success-rate lookup
+    INDEX idx_bucket_hour (bucket_hour),                  -- /api/success-rates
+    INDEX idx_gateway_bucket (gateway, bucket_hour)       -- /api/success-rates/{gateway}
+) ENGINE=InnoDB;
 
 -- Insert sample data (optional - for testing)
 INSERT INTO transactions (
@@ -59,3 +118,28 @@ INSERT INTO transactions (
 ('transaction_002', 'PayU', 'debit_card', 9300.00, 46.00, 9346.00, 'pending'),
 ('transaction_003', 'Cashfree', 'credit_card', 30000.00, 150.00, 30150.00, 'success');
 
+INSERT INTO transaction_ids (transaction_id, created_at)
+SELECT transaction_id, created_at FROM transactions;
+
+-- Build rollups for the sample data
+INSERT INTO transaction_rollups (
+    gateway,
+    payment_mode,
+    bucket_hour,
+    total_transactions,
+    successful_transactions,
+    failed_transactions,
+    pending_transactions,
+    last_transaction
+)
+SELECT
+    gateway,
+    payment_mode,
+    DATE_FORMAT(created_at, '%Y-%m-%d %H:00:00') as bucket_hour,
+    COUNT(*),
+    SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END),
+    MAX(created_at)
+FROM transactions
+GROUP BY gateway, payment_mode, bucket_hour;
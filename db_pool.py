@@ -0,0 +1,340 @@
+"""
+Thread-safe MySQL connection pool used by get_db_connection()
+"""
+
+import threading
+import time
+from collections import deque
+
+import pymysql
+
+
+# Upper bounds (in milliseconds) of the checkout wait time histogram buckets
+WAIT_HISTOGRAM_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be borrowed from the pool in time"""
+
+
+class WaitHistogram:
+    """Cumulative histogram of checkout wait times; callers provide locking"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum_ms = 0.0
+        self._buckets = [0] * (len(WAIT_HISTOGRAM_BUCKETS_MS) + 1)
+
+    def record(self, waited_ms: float):
+        for i, bound in enumerate(WAIT_HISTOGRAM_BUCKETS_MS):
+            if waited_ms <= bound:
+                self._buckets[i] += 1
+                break
+        else:
+            self._buckets[-1] += 1
+        self.count += 1
+        self.sum_ms += waited_ms
+
+    def snapshot(self) -> dict:
+        cumulative = 0
+        histogram = []
+        for bound, count in zip(WAIT_HISTOGRAM_BUCKETS_MS + (float('inf'),), self._buckets):
+            cumulative += count
+            histogram.append({"le_ms": "+Inf" if bound == float('inf') else bound, "count": cumulative})
+        return {"sum": round(self.sum_ms, 3), "count": self.count, "histogram": histogram}
+
+
+class _PooledConnection:
+    """Bookkeeping for a single pooled connection"""
+
+    __slots__ = ("connection", "created_at", "last_used")
+
+    def __init__(self, connection):
+        now = time.monotonic()
+        self.connection = connection
+        self.created_at = now
+        self.last_used = now
+
+
+class ObservedCursor:
+    """Cursor proxy calling observe(query, args, seconds, cursor) after every statement"""
+
+    def __init__(self, cursor, observe):
+        self._cursor = cursor
+        self._observe = observe
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, args)
+        finally:
+            self._observe(query, args, time.perf_counter() - started, self._cursor)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, args)
+        finally:
+            self._observe(query, args, time.perf_counter() - started, self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class ObservedConnection:
+    """Connection proxy whose cursors report each statement to observe"""
+
+    def __init__(self, connection, observe):
+        self.wrapped = connection
+        self.observe = observe
+
+    def cursor(self, *args):
+        return ObservedCursor(self.wrapped.cursor(*args), self.observe)
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+
+class ConnectionPool:
+    """
+    Fixed-ceiling pool of pymysql connections.
+
+    Connections are created lazily up to max_size, health-checked with a ping
+    when they have been idle for longer than ping_interval, recycled after
+    max_lifetime and reaped when idle above min_size for idle_timeout seconds.
+    Borrowers wait at most wait_timeout seconds, and at most max_waiters may
+    wait at once so that an exhausted pool sheds load instead of queueing.
+    """
+
+    def __init__(self, connect_kwargs: dict, min_size: int = 2, max_size: int = 20,
+                 max_lifetime: float = 1800, idle_timeout: float = 300,
+                 wait_timeout: float = 5.0, max_waiters: int = 100,
+                 ping_interval: float = 1.0, reap_interval: float = 30):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size: require 0 <= min_size <= max_size and max_size >= 1")
+
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.wait_timeout = wait_timeout
+        self.max_waiters = max_waiters
+        self.ping_interval = ping_interval
+        self.reap_interval = reap_interval
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._reaper = None
+        self._reaper_stop = threading.Event()
+
+        # Counters exposed through stats()
+        self._total_acquired = 0
+        self._total_timeouts = 0
+        self._total_rejected = 0
+        self._total_created = 0
+        self._total_closed = 0
+        self._wait_times = WaitHistogram()
+
+    def _connect(self) -> _PooledConnection:
+        connection = pymysql.connect(**self.connect_kwargs)
+        with self._lock:
+            self._total_created += 1
+        return _PooledConnection(connection)
+
+    def _close(self, pooled: _PooledConnection):
+        """Close a connection that has already been removed from the pool"""
+        try:
+            if pooled.connection.open:
+                pooled.connection.close()
+        except Exception as e:
+            print(f"Error closing pooled connection: {e}")
+        with self._available:
+            self._size -= 1
+            self._total_closed += 1
+            self._available.notify()
+
+    def _is_healthy(self, pooled: _PooledConnection, now: float) -> bool:
+        if now - pooled.created_at > self.max_lifetime:
+            return False
+        if not pooled.connection.open:
+            return False
+        if now - pooled.last_used > self.ping_interval:
+            try:
+                pooled.connection.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def acquire(self):
+        """Borrow a connection, waiting up to wait_timeout seconds for one to free up"""
+        started = time.monotonic()
+        deadline = started + self.wait_timeout
+
+        while True:
+            create = False
+            with self._available:
+                if self._closed:
+                    raise PoolTimeoutError("Connection pool is closed")
+
+                if not self._idle and self._size >= self.max_size:
+                    if self._waiting >= self.max_waiters:
+                        self._total_rejected += 1
+                        raise PoolTimeoutError("Connection pool exhausted: too many waiting requests")
+
+                    self._waiting += 1
+                    try:
+                        while not self._idle and self._size >= self.max_size and not self._closed:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                self._total_timeouts += 1
+                                raise PoolTimeoutError(
+                                    f"Timed out after {self.wait_timeout}s waiting for a database connection"
+                                )
+                            self._available.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    continue
+
+                if self._idle:
+                    # LIFO keeps the hottest connections in use and lets the rest age out
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                try:
+                    pooled = self._connect()
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+            elif not self._is_healthy(pooled, time.monotonic()):
+                self._close(pooled)
+                continue
+
+            now = time.monotonic()
+            pooled.last_used = now
+            with self._lock:
+                self._in_use[id(pooled.connection)] = pooled
+                self._total_acquired += 1
+                self._wait_times.record((now - started) * 1000)
+            return pooled.connection
+
+    def release(self, connection, discard: bool = False):
+        """Return a borrowed connection; broken or expired connections are closed instead"""
+        with self._lock:
+            pooled = self._in_use.pop(id(connection), None)
+        if pooled is None:
+            return
+
+        now = time.monotonic()
+        if discard or self._closed or not connection.open or now - pooled.created_at > self.max_lifetime:
+            self._close(pooled)
+            return
+
+        pooled.last_used = now
+        with self._available:
+            self._idle.append(pooled)
+            self._available.notify()
+
+    def _reap(self):
+        """Close expired and surplus idle connections, then top the pool back up to min_size"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            keep = deque()
+            surplus = self._size - self.min_size
+            # Oldest-returned connections sit at the left of the deque
+            while self._idle:
+                pooled = self._idle.popleft()
+                too_old = now - pooled.created_at > self.max_lifetime
+                too_idle = surplus > 0 and now - pooled.last_used > self.idle_timeout
+                if too_old or too_idle:
+                    expired.append(pooled)
+                    surplus -= 1
+                else:
+                    keep.append(pooled)
+            self._idle = keep
+
+        for pooled in expired:
+            self._close(pooled)
+
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    break
+                self._size += 1
+            try:
+                pooled = self._connect()
+            except Exception as e:
+                with self._lock:
+                    self._size -= 1
+                print(f"Error warming connection pool: {e}")
+                break
+            with self._available:
+                self._idle.appendleft(pooled)
+                self._available.notify()
+
+    def _reaper_loop(self):
+        while not self._reaper_stop.wait(self.reap_interval):
+            try:
+                self._reap()
+            except Exception as e:
+                print(f"Connection pool reaper error: {e}")
+
+    def start(self):
+        """Warm the pool to min_size and start the background reaper"""
+        with self._lock:
+            self._closed = False
+            if self._reaper is not None:
+                return
+            self._reaper_stop.clear()
+            self._reaper = threading.Thread(target=self._reaper_loop, name="db-pool-reaper", daemon=True)
+        self._reap()
+        self._reaper.start()
+
+    def close(self):
+        """Stop the reaper and close every idle connection"""
+        with self._available:
+            self._closed = True
+            reaper, self._reaper = self._reaper, None
+            idle = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        self._reaper_stop.set()
+        if reaper is not None:
+            reaper.join(timeout=self.reap_interval)
+        for pooled in idle:
+            self._close(pooled)
+
+    def stats(self) -> dict:
+        """Snapshot of pool occupancy and checkout wait times"""
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "total_acquired": self._total_acquired,
+                "total_timeouts": self._total_timeouts,
+                "total_rejected": self._total_rejected,
+                "total_created": self._total_created,
+                "total_closed": self._total_closed,
+                "wait_time_ms": self._wait_times.snapshot(),
+            }
@@ -0,0 +1,194 @@
+"""
+Precompiled fee schedules.
+
+Schedules are compiled once into immutable sorted breakpoints so a fee lookup
+is a single bisect instead of building and scanning the tier table per call.
+
+A tier is either an (inclusive upper bound, fee percentage) tuple or a dict
+with "up_to", "percentage" and optional "flat", "min_fee" and "max_fee" keys,
+with amounts in rupees. The fee for an amount in a tier is
+flat + amount * percentage / 100, rounded half up to the paisa, raised to
+min_fee and capped at max_fee if the tier has one. The fee percentage the
+engine returns is the tier's configured rate; effective_percentage() gives
+fee / amount * 100, which also reflects flat fees, minimums and caps.
+
+Schedules are compiled to integer paise and parts-per-million rates, and the
+engine prices amounts given in paise, so fee math is exact integer arithmetic.
+"""
+
+from bisect import bisect_left
+from typing import Sequence, Union
+
+from money import apply_ppm, percent_to_ppm, to_paise
+
+# Fee tiers per payment mode as (inclusive upper bound, fee percentage),
+# shared by every gateway without its own schedule for that mode;
+# the last tier of each mode has no upper bound
+DEFAULT_FEE_SCHEDULES = {
+    "debit_card": [
+        (2000, 0.0),     # ≤ ₹2,000: 0%
+        (None, 0.5),     # > ₹2,000: 0.5%
+    ],
+    "credit_card": [
+        (25000, 0.1),    # ≤ ₹25,000: 0.1%
+        (None, 0.5),     # > ₹25,000: 0.5%
+    ],
+    "netbanking": [
+        (10000, 0.0),    # ≤ ₹10,000: 0%
+        (50000, 0.75),   # ₹10,001-50,000: 0.75%
+        (None, 1.0),     # > ₹50,000: 1%
+    ],
+    "upi": [
+        (None, 0.0),     # Any amount: 0%
+    ],
+}
+
+# Schedule applied to payment modes without one of their own
+DEFAULT_PAYMENT_MODE = "upi"
+
+# Decimal places of the effective fee percentage
+FEE_PERCENTAGE_PLACES = 4
+
+
+def _tier_fields(tier) -> tuple:
+    """Normalize a tier spec to (upper_bound, percentage, flat, min_fee, max_fee) in rupees"""
+    if isinstance(tier, dict):
+        return (
+            tier.get("up_to"),
+            tier.get("percentage", 0),
+            tier.get("flat", 0),
+            tier.get("min_fee", 0),
+            tier.get("max_fee"),
+        )
+    upper_bound, percentage = tier
+    return upper_bound, percentage, 0, 0, None
+
+
+def effective_percentage(fee: int, amount: int, percentage: float) -> float:
+    """Fee as a percentage of amount; the configured percentage for a zero amount"""
+    if not amount:
+        return percentage
+    return round(fee * 100 / amount, FEE_PERCENTAGE_PLACES)
+
+
+class FeeSchedule:
+    """Immutable tier table for one (gateway, payment mode), in paise"""
+
+    __slots__ = ("upper_bounds", "tiers")
+
+    def __init__(self, tiers: Sequence):
+        upper_bounds = []
+        rules = []
+        for i, tier in enumerate(tiers):
+            upper_bound, percentage, flat, min_fee, max_fee = _tier_fields(tier)
+            if upper_bound is None:
+                if i != len(tiers) - 1:
+                    raise ValueError("Only the last fee tier may be unbounded")
+            else:
+                upper_bound = to_paise(upper_bound)
+                if upper_bounds and upper_bound <= upper_bounds[-1]:
+                    raise ValueError("Fee tier upper bounds must be strictly increasing")
+                upper_bounds.append(upper_bound)
+
+            min_fee = to_paise(min_fee)
+            if max_fee is not None:
+                max_fee = to_paise(max_fee)
+                if min_fee > max_fee:
+                    raise ValueError("A fee tier's min_fee cannot exceed its max_fee")
+            # (rate in ppm, flat paise, min paise, max paise or None, percentage as configured)
+            rules.append((percent_to_ppm(percentage), to_paise(flat), min_fee, max_fee, float(percentage)))
+
+        if not rules or len(rules) == len(upper_bounds):
+            raise ValueError("A fee schedule must end with an unbounded tier")
+
+        object.__setattr__(self, "upper_bounds", tuple(upper_bounds))
+        object.__setattr__(self, "tiers", tuple(rules))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FeeSchedule is immutable")
+
+    def calculate(self, amount: int) -> tuple[int, int, float]:
+        """Return (fee, total, fee_percentage) for an amount in paise"""
+        ppm, flat, min_fee, max_fee, percentage = self.tiers[bisect_left(self.upper_bounds, amount)]
+        fee = flat + apply_ppm(amount, ppm)
+        if fee < min_fee:
+            fee = min_fee
+        if max_fee is not None and fee > max_fee:
+            fee = max_fee
+        return fee, amount + fee, percentage
+
+
+class FeeEngine:
+    """
+    Compiled fee schedules for every (gateway, payment mode).
+
+    default_schedules apply to any gateway; gateway_schedules maps a gateway
+    to per-mode overrides. Both are resolved at compile time into one nested
+    lookup table, so pricing an option is two dict lookups and a bisect.
+    Unknown payment modes use the default payment mode's schedule.
+    """
+
+    __slots__ = ("_defaults", "_by_gateway", "_fallback")
+
+    def __init__(self, default_schedules: dict, gateway_schedules: dict = None,
+                 default_mode: str = DEFAULT_PAYMENT_MODE):
+        defaults = {mode: FeeSchedule(tiers) for mode, tiers in default_schedules.items()}
+        if default_mode not in defaults:
+            raise ValueError(f"Default payment mode '{default_mode}' has no fee schedule")
+
+        by_gateway = {}
+        for gateway, overrides in (gateway_schedules or {}).items():
+            schedules = dict(defaults)
+            schedules.update((mode, FeeSchedule(tiers)) for mode, tiers in overrides.items())
+            by_gateway[gateway] = schedules
+
+        object.__setattr__(self, "_defaults", defaults)
+        object.__setattr__(self, "_by_gateway", by_gateway)
+        object.__setattr__(self, "_fallback", defaults[default_mode])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FeeEngine is immutable")
+
+    def calculate(self, amount: int, payment_mode: str, gateway: str = None) -> tuple[int, int, float]:
+        """Return (fee, total, fee_percentage) for one amount in paise"""
+        return self._by_gateway.get(gateway, self._defaults).get(payment_mode, self._fallback).calculate(amount)
+
+    def calculate_fees(self, amounts: Sequence[int], modes: Union[str, Sequence[str]],
+                       gateways: Union[str, Sequence[str], None] = None
+                       ) -> tuple[list[int], list[int], list[float]]:
+        """
+        Batch version of calculate() for amounts in paise.
+
+        modes and gateways are each either a single value applied to every
+        amount or a sequence parallel to amounts. Returns parallel lists of
+        fees, totals (both in paise) and fee percentages.
+        """
+        count = len(amounts)
+        if isinstance(modes, str):
+            modes = [modes] * count
+        if gateways is None or isinstance(gateways, str):
+            gateways = [gateways] * count
+        if len(modes) != count or len(gateways) != count:
+            raise ValueError("amounts, modes and gateways must have the same length")
+
+        by_gateway = self._by_gateway
+        defaults = self._defaults
+        fallback = self._fallback
+        fees = [0] * count
+        totals = [0] * count
+        percentages = [0.0] * count
+
+        for i, (amount, mode, gateway) in enumerate(zip(amounts, modes, gateways)):
+            schedule = by_gateway.get(gateway, defaults).get(mode, fallback)
+            ppm, flat, min_fee, max_fee, percentage = schedule.tiers[bisect_left(schedule.upper_bounds, amount)]
+            # apply_ppm() inlined to avoid a call per amount
+            fee = flat + (amount * ppm + 500_000) // 1_000_000
+            if fee < min_fee:
+                fee = min_fee
+            if max_fee is not None and fee > max_fee:
+                fee = max_fee
+            fees[i] = fee
+            totals[i] = amount + fee
+            percentages[i] = percentage
+
+        return fees, totals, percentages
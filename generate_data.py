@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Synthetic transactions at production scale for benchmarks and index work.
+
+Worker processes each open their own connection and write chunks of
+chunk_size rows with multi-row INSERTs (pymysql's executemany), registering
+every ID in transaction_ids and adding the chunk's counts to its rollup
+buckets in the same database transaction, so existing rollups (including
+archived rows' counts) and concurrent writers are left intact. Rows follow
+the configurable DISTRIBUTIONS over gateway/payment_mode, amount, status and
+created_at. Fees come from the pricing config, so totals look real. When all
+chunks are in, the tables are analyzed.
+
+Each chunk draws from its own generator seeded by (seed, chunk number). The
+same seed, chunk size, end date and distributions therefore produce the same
+rows whatever the number of workers. Transaction IDs are
+"<prefix>-<row number>"; a prefix already in use is refused.
+
+    python generate_data.py [--rows 10000000] [--days 90] [--workers 8] [--seed 42]
+                            [--prefix syn] [--end 2026-01-01] [--distributions dist.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+import pymysql
+
+import rollups
+from money import to_decimal
+from pricing_config import PricingConfigStore
+
+GENERATOR_CONFIG = {
+    'rows': 1_000_000,
+    'days': 90,               # created_at is spread over the N days before end
+    'workers': os.cpu_count() or 4,
+    'chunk_size': 5000,       # Rows per worker transaction
+    'prefix': 'syn',
+    'seed': 42,
+    'pricing_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pricing_config.json'),
+}
+
+# Weights are relative; --distributions takes a JSON file overriding any of these keys
+DISTRIBUTIONS = {
+    'gateway': {'Razorpay': 50, 'PayU': 30, 'Cashfree': 20},
+    'payment_mode': {'upi': 55, 'debit_card': 20, 'credit_card': 18, 'netbanking': 7},
+    # Base amount in rupees: log-normal around the median, clamped to [min, max]
+    'amount': {'median': 800, 'sigma': 1.3, 'min': 1, 'max': 500000},
+    'status': {'success': 86, 'failed': 9, 'pending': 4, 'cancelled': 1},
+    # Per-gateway replacements for 'status', so success rates differ by gateway
+    'status_by_gateway': {
+        'PayU': {'success': 81, 'failed': 14, 'pending': 4, 'cancelled': 1},
+        'Cashfree': {'success': 89, 'failed': 7, 'pending': 3, 'cancelled': 1},
+    },
+    # Relative volume for each hour of the day, 00:00 first
+    'hour_of_day': [2, 1, 1, 1, 1, 2, 3, 5, 7, 8, 9, 9, 10, 10, 9, 9, 9, 9, 10, 11, 12, 11, 8, 4],
+    # Compound daily growth of volume across the window; 0 for flat
+    'daily_growth': 0.005,
+}
+
+REGISTER_SQL = """
+    INSERT INTO transaction_ids (transaction_id, created_at) VALUES (%s, %s)
+"""
+
+INSERT_SQL = """
+    INSERT INTO transactions
+    (transaction_id, gateway, payment_mode, base_amount, fee_amount, total_amount, status,
+     gateway_transaction_id, created_at, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+def transaction_id(prefix: str, row: int) -> str:
+    """ID of the given row number of a generated data set"""
+    return f"{prefix}-{row:010d}"
+
+
+class GeneratorSpec:
+    """Everything a worker needs to generate any chunk; plain data so it pickles"""
+
+    def __init__(self, rows: int, days: int, chunk_size: int, seed: int, prefix: str, end: datetime,
+                 payment_methods, distributions: dict = None):
+        distributions = {**DISTRIBUTIONS, **(distributions or {})}
+        self.rows = rows
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.prefix = prefix
+        self.start = end - timedelta(days=days)
+
+        gateway_weights = distributions['gateway']
+        mode_weights = distributions['payment_mode']
+        self.methods = [(gateway, mode) for gateway, mode in payment_methods
+                        if gateway_weights.get(gateway, 0) * mode_weights.get(mode, 0) > 0]
+        if not self.methods:
+            raise ValueError("Distributions give every payment method a weight of 0")
+        self.method_weights = list(accumulate(gateway_weights[gateway] * mode_weights[mode]
+                                              for gateway, mode in self.methods))
+
+        amount = distributions['amount']
+        self.amount_mu = math.log(amount['median'] * 100)
+        self.amount_sigma = amount['sigma']
+        self.amount_min = amount['min'] * 100
+        self.amount_max = amount['max'] * 100
+
+        # gateway -> (statuses, cumulative weights)
+        self.statuses = {}
+        for gateway in gateway_weights:
+            weights = distributions['status_by_gateway'].get(gateway, distributions['status'])
+            self.statuses[gateway] = (list(weights), list(accumulate(weights.values())))
+
+        growth = 1 + distributions['daily_growth']
+        self.day_weights = list(accumulate(growth ** day for day in range(days)))
+        self.hour_weights = list(accumulate(distributions['hour_of_day']))
+
+    @property
+    def chunks(self) -> int:
+        return (self.rows + self.chunk_size - 1) // self.chunk_size
+
+
+def generate_chunk(spec: GeneratorSpec, fee_engine, chunk: int) -> list[tuple]:
+    """Rows of one chunk as INSERT_SQL parameters"""
+    rng = random.Random(spec.seed * 1_000_003 + chunk)
+    first = chunk * spec.chunk_size
+    count = min(spec.chunk_size, spec.rows - first)
+
+    methods = rng.choices(spec.methods, cum_weights=spec.method_weights, k=count)
+    gateways = [gateway for gateway, _ in methods]
+    modes = [mode for _, mode in methods]
+    amounts = [min(spec.amount_max, max(spec.amount_min, int(rng.lognormvariate(spec.amount_mu, spec.amount_sigma))))
+               for _ in range(count)]
+    fees, totals, _ = fee_engine.calculate_fees(amounts, modes, gateways)
+    days = rng.choices(range(len(spec.day_weights)), cum_weights=spec.day_weights, k=count)
+    hours = rng.choices(range(24), cum_weights=spec.hour_weights, k=count)
+
+    rows = []
+    for i in range(count):
+        gateway = gateways[i]
+        statuses, status_weights = spec.statuses[gateway]
+        status = statuses[bisect_left(status_weights, rng.random() * status_weights[-1])]
+        created_at = spec.start + timedelta(days=days[i], hours=hours[i], seconds=rng.randrange(3600))
+        if status == 'pending':
+            gateway_transaction_id, updated_at = None, created_at
+        else:
+            gateway_transaction_id = f"{gateway.lower()}_{rng.getrandbits(64):016x}"
+            updated_at = created_at + timedelta(seconds=rng.randrange(1, 120))
+        rows.append((
+            transaction_id(spec.prefix, first + i), gateway, modes[i],
+            to_decimal(amounts[i]), to_decimal(fees[i]), to_decimal(totals[i]), status,
+            gateway_transaction_id, created_at, updated_at,
+        ))
+    return rows
+
+
+# Per-process state of a worker in the pool
+_worker = {}
+
+
+def _init_worker(db_config: dict, spec: GeneratorSpec, pricing_path: str):
+    pricing = PricingConfigStore(pricing_path)
+    pricing.reload()
+    _worker['spec'] = spec
+    _worker['fee_engine'] = pricing.current.fee_engine
+    _worker['connection'] = pymysql.connect(autocommit=False, **db_config)
+
+
+def _load_chunk(chunk: int) -> int:
+    rows = generate_chunk(_worker['spec'], _worker['fee_engine'], chunk)
+    deltas = rollups.RollupDeltas()
+    for row in rows:
+        deltas.insert(row[1], row[2], row[6], row[8])
+    connection = _worker['connection']
+    with connection.cursor() as cursor:
+        cursor.executemany(REGISTER_SQL, [(row[0], row[8]) for row in rows])
+        cursor.executemany(INSERT_SQL, rows)
+        cursor.executemany(rollups.UPSERT_BUCKET_SQL, deltas.drain())
+    connection.commit()
+    return len(rows)
+
+
+def generate(db_config: dict, rows: int = GENERATOR_CONFIG['rows'], days: int = GENERATOR_CONFIG['days'],
+             workers: int = GENERATOR_CONFIG['workers'], chunk_size: int = GENERATOR_CONFIG['chunk_size'],
+             seed: int = GENERATOR_CONFIG['seed'], prefix: str = GENERATOR_CONFIG['prefix'],
+             end: datetime = None, distributions: dict = None,
+             pricing_path: str = GENERATOR_CONFIG['pricing_path'], verbose: bool = True) -> dict:
+    """Insert rows synthetic transactions with their rollup counts; returns timing stats"""
+    pricing = PricingConfigStore(pricing_path)
+    pricing.reload()
+    end = end or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    spec = GeneratorSpec(rows, days, chunk_size, seed, prefix, end, pricing.current.payment_methods, distributions)
+
+    connection = pymysql.connect(autocommit=True, **db_config)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM transaction_ids WHERE transaction_id LIKE %s LIMIT 1", (prefix + "-%",))
+            if cursor.fetchone():
+                raise ValueError(f"Transactions with prefix {prefix!r} already exist; pick another --prefix")
+
+        started = time.perf_counter()
+        written = 0
+        report_every = max(1, spec.chunks // 20)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(db_config, spec, pricing_path)) as pool:
+            for done, count in enumerate(pool.map(_load_chunk, range(spec.chunks)), 1):
+                written += count
+                if verbose and (done % report_every == 0 or done == spec.chunks):
+                    elapsed = time.perf_counter() - started
+                    print(f"  {written:,}/{rows:,} rows  {written / elapsed:,.0f} rows/s")
+        load_seconds = time.perf_counter() - started
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE TABLE transactions, transaction_ids")
+            cursor.fetchall()
+    finally:
+        connection.close()
+
+    return {
+        "rows": written,
+        "prefix": prefix,
+        "load_seconds": round(load_seconds, 3),
+        "rows_per_second": round(written / load_seconds) if load_seconds else None,
+        "total_seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+if __name__ == "__main__":
+    from main import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Fill transactions with synthetic data")
+    parser.add_argument("--rows", type=int, default=GENERATOR_CONFIG['rows'])
+    parser.add_argument("--days", type=int, default=GENERATOR_CONFIG['days'])
+    parser.add_argument("--workers", type=int, default=GENERATOR_CONFIG['workers'])
+    parser.add_argument("--chunk-size", type=int, default=GENERATOR_CONFIG['chunk_size'])
+    parser.add_argument("--seed", type=int, default=GENERATOR_CONFIG['seed'])
+    parser.add_argument("--prefix", default=GENERATOR_CONFIG['prefix'])
+    parser.add_argument("--end", type=datetime.fromisoformat, help="created_at upper bound (default: today 00:00)")
+    parser.add_argument("--distributions", help="JSON file overriding DISTRIBUTIONS keys")
+    args = parser.parse_args()
+
+    overrides = None
+    if args.distributions:
+        with open(args.distributions) as file:
+            overrides = json.load(file)
+
+    print(f"Generating {args.rows:,} transactions with {args.workers} workers (seed {args.seed})")
+    stats = generate(DB_CONFIG, args.rows, args.days, args.workers, args.chunk_size, args.seed,
+                     args.prefix, args.end, overrides)
+    print(f"Loaded {stats['rows']:,} rows in {stats['load_seconds']}s ({stats['rows_per_second']:,} rows/s), "
+          f"tables analyzed in {stats['total_seconds'] - stats['load_seconds']:.1f}s")
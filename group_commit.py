@@ -0,0 +1,126 @@
+"""
+Group commit for the request path: many callers, one database transaction.
+
+Callers submit() an item and await its result. A single flusher task collects
+queued items until max_batch is reached or max_delay has passed since the
+first one arrived, hands the whole batch to the flush coroutine (which writes
+and commits it), and resolves every caller's future with its own result. Each
+commit then pays for one fsync per batch instead of one per request.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+
+class GroupCommitWriter:
+    """
+    Batches submitted items into calls of flush(items) -> list of per-item results.
+
+    flush must return one result per item, in order, only after the batch is
+    durably committed. If it raises, every caller in the batch gets the error.
+    """
+
+    def __init__(self, flush: Callable[[list], Awaitable[list]], max_batch: int = 200,
+                 max_delay: float = 0.005, max_pending: int = 10000):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+
+        self._queue = None
+        self._task = None
+
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+        self._largest_batch = 0
+        self._last_flush_ms = None
+
+    async def start(self):
+        """Start the flusher task on the running event loop"""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._task = asyncio.create_task(self._run(), name="group-commit-flusher")
+
+    async def stop(self):
+        """Flush what is queued, then stop the flusher task"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        await self._queue.join()
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def submit(self, item):
+        """Queue item and wait for the result of its batch's flush; raises asyncio.QueueFull when overloaded"""
+        if self._task is None:
+            raise RuntimeError("Group commit writer is not running")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """Wait for one item, then gather more until the batch is full or its deadline passes"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_delay
+
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            started = time.monotonic()
+
+            try:
+                results = await self.flush([item for item, _ in batch])
+            except Exception as e:
+                self._errors += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    # The caller may have gone away while its batch was being written
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            self._batches += 1
+            self._items += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+            self._last_flush_ms = round((time.monotonic() - started) * 1000, 3)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "max_batch": self.max_batch,
+            "max_delay_ms": self.max_delay * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self._batches,
+            "items": self._items,
+            "errors": self._errors,
+            "average_batch": round(self._items / self._batches, 2) if self._batches else None,
+            "largest_batch": self._largest_batch,
+            "last_flush_ms": self._last_flush_ms,
+        }
@@ -1,13 +1,36 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal
 import uvicorn
 import pymysql
-from contextlib import contextmanager
+from contextlib import contextmanager, asynccontextmanager
+import asyncio
+import base64
+import hmac
+import inspect
+import json
+import os
 import uuid
 
-app = FastAPI(title="Payment Orchestration MVP", version="1.0.0")
+from db_pool import ConnectionPool, ObservedConnection, PoolTimeoutError
+from async_db import AsyncConnectionPool, AsyncObservedConnection, ThreadedPool, streaming_cursor
+from success_rate_cache import SuccessRateCache
+from rollups import RollupDeltas, window_start
+from pricing_config import PricingConfigStore
+from fee_engine import effective_percentage
+from money import to_decimal, to_paise, to_rupees
+from archiver import TransactionArchiver
+from group_commit import GroupCommitWriter
+from transaction_cache import TransactionCache
+from status_events import StatusEvents, SubscriberLimitError
+from metrics import Metrics, MetricsMiddleware
+from query_stats import ORDER_KEYS, QueryStats
+from profiler import ProfilerBusyError, SamplingProfiler
 
 # Database configuration
 DB_CONFIG = {
@@ -17,30 +40,282 @@ DB_CONFIG = {
     'database': 'payment_orchestration',
 }
 
+# Request path database driver: 'sync' runs pymysql on the threadpool,
+# 'async' uses aiomysql so in-flight requests waiting on MySQL hold no thread
+DB_MODE = 'sync'
+
+# Connection pool configuration (times in seconds)
+DB_POOL_CONFIG = {
+    'min_size': 2,
+    'max_size': 20,
+    'max_lifetime': 1800,   # Recycle connections older than this
+    'idle_timeout': 300,    # Close idle connections above min_size after this
+    'wait_timeout': 5.0,    # Max time a request waits for a free connection
+    'max_waiters': 100,     # Requests beyond this many waiters are rejected immediately
+    'ping_interval': 1.0,   # Ping connections idle longer than this before handing them out
+    'reap_interval': 30,
+}
+
+# Success rate cache configuration (times in seconds)
+SUCCESS_RATE_CACHE_CONFIG = {
+    'window_days': 30,        # Window used for checkout recommendations
+    'ttl': 60,                # Entries younger than this are served as fresh
+    'stale_ttl': 600,         # Older entries are served stale while they refresh
+    'refresh_interval': 10,   # How often the background refresher runs
+    'max_idle': 3600,         # Entries not read for this long are dropped
+    'max_backoff': 300,       # Longest wait between retries while loads keep failing
+}
+
+# Gateway catalog and fee schedules, reloaded when the file changes
+PRICING_CONFIG = {
+    'path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pricing_config.json'),
+    'poll_interval': 5,   # Seconds between checks for a changed file
+}
+
+# GET /api/transactions
+LIST_TRANSACTIONS_CONFIG = {
+    'default_limit': 50,
+    'max_limit': 1000,            # JSON pages are capped, follow next_cursor for more
+    'stream_batch_size': 1000,    # Rows fetched from the server per read in NDJSON mode
+}
+
+# POST /api/transactions/bulk
+BULK_INSERT_CONFIG = {
+    'chunk_size': 500,      # Transactions inserted and committed per database transaction
+    'max_items': 50000,     # Longer JSON arrays are rejected with 413, NDJSON streams are cut off here
+}
+
+# POST /api/transactions/bulk-status
+BULK_UPDATE_CONFIG = {
+    'chunk_size': 500,      # Status updates locked, applied and committed per database transaction
+    'max_items': 100000,    # Longer JSON arrays are rejected with 413, NDJSON streams are cut off here
+}
+
+# Group commit for POST /api/transactions: inserts from concurrent requests are
+# written and committed together, adding up to max_delay_ms of latency
+GROUP_COMMIT_CONFIG = {
+    'enabled': False,
+    'max_batch': 200,       # Flush as soon as this many inserts are queued
+    'max_delay_ms': 5,      # Or this long after the first one arrived
+    'max_pending': 10000,   # Inserts beyond this many queued are rejected with 503
+}
+
+# Read-through cache for GET /api/transactions/{transaction_id}
+TRANSACTION_CACHE_CONFIG = {
+    'enabled': True,
+    'max_entries': 10000,
+    'ttl': 2,   # Seconds; bounds staleness for writes made through other workers
+}
+
+# Writes return this header; readers send it back to be guaranteed to see their write
+TRANSACTION_VERSION_HEADER = 'X-Transaction-Version'
+
+# Long-poll and SSE subscriptions to status changes (times in seconds)
+STATUS_EVENTS_CONFIG = {
+    'max_wait': 60,           # Longest a long-poll request is parked
+    'resync_interval': 15,    # SSE streams recheck the database (and send a keepalive) this often
+    'max_stream': 300,        # SSE streams are closed after this long; clients reconnect
+    'max_subscribers': 10000,
+}
+
+# Settled transactions are moved to transactions_archive after min_age_days
+ARCHIVE_CONFIG = {
+    'enabled': True,
+    'min_age_days': 90,
+    'batch_size': 1000,   # Rows moved per short transaction
+    'interval': 3600,     # Seconds between archiver runs
+    'pause': 0.05,        # Seconds between batches so request traffic gets the locks
+}
+
+# Latency histograms served on /metrics; when disabled instrumentation is a no-op
+METRICS_CONFIG = {
+    'enabled': True,
+}
+
+# Per-fingerprint statement statistics; statements slower than the threshold are logged
+QUERY_STATS_CONFIG = {
+    'enabled': True,
+    'max_fingerprints': 500,    # Distinct statements tracked; the least costly is evicted beyond this
+    'slow_threshold_ms': 200,
+    'slow_log_size': 100,       # Recent slow statements kept for the admin endpoint
+}
+
+# Admin endpoints require this token in the X-Admin-Token header and are disabled when it is unset
+ADMIN_CONFIG = {
+    'token': os.environ.get('ADMIN_TOKEN'),
+}
+
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+# On-demand sampling profiles of this worker (admin only)
+PROFILER_CONFIG = {
+    'max_seconds': 60,
+    'interval_ms': 10,    # Default time between samples
+}
+
+metrics = Metrics(METRICS_CONFIG['enabled'])
+
+query_stats = QueryStats(
+    QUERY_STATS_CONFIG['enabled'],
+    QUERY_STATS_CONFIG['max_fingerprints'],
+    QUERY_STATS_CONFIG['slow_threshold_ms'],
+    QUERY_STATS_CONFIG['slow_log_size']
+)
+
+profiler = SamplingProfiler()
+
+transaction_cache = TransactionCache(TRANSACTION_CACHE_CONFIG['max_entries'], TRANSACTION_CACHE_CONFIG['ttl'])
+
+status_events = StatusEvents(STATUS_EVENTS_CONFIG['max_subscribers'])
+
+pricing = PricingConfigStore(PRICING_CONFIG['path'], PRICING_CONFIG['poll_interval'])
+
+db_pool = ConnectionPool(
+    connect_kwargs={
+        'host': DB_CONFIG['host'],
+        'user': DB_CONFIG['user'],
+        'password': DB_CONFIG['password'],
+        'database': DB_CONFIG['database'],
+        'cursorclass': pymysql.cursors.DictCursor,
+        'autocommit': False,
+    },
+    **DB_POOL_CONFIG
+)
+
+# Pool serving request handlers; background threads always use db_pool
+if DB_MODE == 'async':
+    request_db_pool = AsyncConnectionPool(
+        connect_kwargs={
+            'host': DB_CONFIG['host'],
+            'user': DB_CONFIG['user'],
+            'password': DB_CONFIG['password'],
+            'db': DB_CONFIG['database'],
+            'autocommit': False,
+        },
+        **DB_POOL_CONFIG
+    )
+else:
+    request_db_pool = ThreadedPool(db_pool)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services on startup and stop them on shutdown"""
+    try:
+        db_pool.start()
+        if DB_MODE == 'async':
+            await request_db_pool.start()
+    except Exception as e:
+        print(f"Error starting connection pool: {e}")
+
+    pricing.start()
+    if pricing.last_error:
+        print(pricing.last_error)
+
+    # Warm the success rate cache so the first checkouts are served from memory
+    try:
+        success_rate_cache.load(pricing.current.payment_methods, SUCCESS_RATE_CACHE_CONFIG['window_days'])
+    except Exception as e:
+        print(f"Error warming success rate cache: {e}")
+    success_rate_cache.start()
+
+    if ARCHIVE_CONFIG['enabled']:
+        archiver.start()
+
+    if GROUP_COMMIT_CONFIG['enabled']:
+        await group_commit.start()
+
+    yield
+
+    await group_commit.stop()
+    archiver.stop()
+    success_rate_cache.stop()
+    pricing.stop()
+    if DB_MODE == 'async':
+        await request_db_pool.close()
+    db_pool.close()
+
+
+app = FastAPI(title="Payment Orchestration MVP", version="1.0.0", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+
+def observe_statement(query, args, seconds: float, cursor):
+    """Called by instrumented cursors after every statement"""
+    metrics.observe_span("db_execute", seconds)
+    query_stats.record(query, args, seconds, cursor)
+
+
+def observing_statements() -> bool:
+    return metrics.enabled or query_stats.enabled
+
+
+def require_admin(token: Optional[str] = Header(None, alias=ADMIN_TOKEN_HEADER)):
+    """Dependency guarding admin endpoints"""
+    if not ADMIN_CONFIG['token']:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if token is None or not hmac.compare_digest(token.encode(), ADMIN_CONFIG['token'].encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
 
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections"""
-    connection = None
+    """Context manager that borrows a database connection from the pool"""
     try:
-        connection = pymysql.connect(
-            host=DB_CONFIG['host'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password'],
-            database=DB_CONFIG['database'],
-            cursorclass=pymysql.cursors.DictCursor,
-            autocommit=False
-        )
-        yield connection
-        connection.commit()
+        with metrics.span("db_connection_acquire"):
+            connection = db_pool.acquire()
+    except PoolTimeoutError as e:
+        print(f"Database error: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    broken = False
+    try:
+        with metrics.span("db_connection"):
+            yield ObservedConnection(connection, observe_statement) if observing_statements() else connection
+            connection.commit()
     except Exception as e:
-        if connection:
+        try:
             connection.rollback()
+        except Exception:
+            broken = True
+        if isinstance(e, pymysql.err.OperationalError):
+            broken = True
+        print(f"Database error: {e}")
+        raise
+    finally:
+        db_pool.release(connection, discard=broken)
+
+
+@asynccontextmanager
+async def get_async_db_connection():
+    """Async context manager that borrows a connection from the request path pool"""
+    try:
+        with metrics.span("db_connection_acquire"):
+            connection = await request_db_pool.acquire()
+    except PoolTimeoutError as e:
+        print(f"Database error: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    broken = False
+    try:
+        with metrics.span("db_connection"):
+            yield AsyncObservedConnection(connection, observe_statement) if observing_statements() else connection
+            await connection.commit()
+    except (asyncio.CancelledError, GeneratorExit):
+        # The client went away mid-statement or mid-stream; the connection state is unknown
+        broken = True
+        raise
+    except Exception as e:
+        try:
+            await connection.rollback()
+        except Exception:
+            broken = True
+        if isinstance(e, pymysql.err.OperationalError):
+            broken = True
         print(f"Database error: {e}")
         raise
     finally:
-        if connection  and connection.open:
-            connection.close()
+        await request_db_pool.release(connection, discard=broken)
 
 
 # Data models
@@ -51,11 +326,12 @@ class PaymentOption(BaseModel):
     fee_amount: float
     total_amount: float
     fee_percentage: float
+    effective_fee_percentage: float
     success_rate: Optional[float] = None
 
 
 class CheckoutRequest(BaseModel):
-    amount: float
+    amount: Decimal
 
 
 class CheckoutResponse(BaseModel):
@@ -68,12 +344,19 @@ class TransactionRequest(BaseModel):
     transaction_id: str
     gateway: str
     payment_mode: str
-    base_amount: float
-    fee_amount: float
-    total_amount: float
+    base_amount: Decimal
+    fee_amount: Decimal
+    total_amount: Decimal
     status: str = "pending"
 
 
+class TransactionStatusUpdate(BaseModel):
+    transaction_id: str
+    status: str
+    gateway_transaction_id: Optional[str] = None
+    gateway_response: Optional[str] = None
+
+
 class TransactionResponse(BaseModel):
     id: int
     transaction_id: str
@@ -88,121 +371,399 @@ class TransactionResponse(BaseModel):
     updated_at: datetime
 
 
-# Simplified fee calculation
-def calculate_fee(amount: float, payment_mode: str) -> tuple[float, float, float]:
-    """Calculate fee based on payment mode and amount"""
-    
-    fee_configs = {
-        "debit_card": {
-            "ranges": [
-                (0, 2000, 0.0),      # ≤ ₹2,000: 0%
-                (2000.01, float('inf'), 0.5)  # > ₹2,000: 0.5%
-            ]
-        },
-        "credit_card": {
-            "ranges": [
-                (0, 25000, 0.1),     # ≤ ₹25,000: 0.1%
-                (25000.01, float('inf'), 0.5)  # > ₹25,000: 0.5%
-            ]
-        },
-        "netbanking": {
-            "ranges": [
-                (0, 10000, 0.0),     # ≤ ₹10,000: 0%
-                (10000.01, 50000, 0.75),  # ₹10,001-50,000: 0.75%
-                (50000.01, float('inf'), 1.0)  # > ₹50,000: 1%
-            ]
-        },
-        "upi": {
-            "ranges": [
-                (0, float('inf'), 0.0)  # Any amount: 0%
-            ]
-        }
-    }
-    
-    config = fee_configs.get(payment_mode, fee_configs["upi"])
-    
-    # Find applicable range
-    fee_percentage = 0.0
-    for min_amount, max_amount, percentage in config["ranges"]:
-        if min_amount <= amount <= max_amount:
-            fee_percentage = percentage
-            break
-    
-    # Calculate fee and total
-    fee_amount = (amount * fee_percentage) / 100
-    total_amount = amount + fee_amount
-    
-    return fee_amount, total_amount, fee_percentage
+# Selectable fields of transactions aliased as t, for the fields= parameter.
+# Amount columns are read as integer paise so rows never go through Decimal
+TRANSACTION_FIELD_COLUMNS = {
+    'id': 't.id',
+    'transaction_id': 't.transaction_id',
+    'gateway': 't.gateway',
+    'payment_mode': 't.payment_mode',
+    'base_amount': 'CAST(t.base_amount * 100 AS SIGNED) AS base_paise',
+    'fee_amount': 'CAST(t.fee_amount * 100 AS SIGNED) AS fee_paise',
+    'total_amount': 'CAST(t.total_amount * 100 AS SIGNED) AS total_paise',
+    'status': 't.status',
+    'gateway_transaction_id': 't.gateway_transaction_id',
+    'created_at': 't.created_at',
+    'updated_at': 't.updated_at',
+    'gateway_response': 't.gateway_response',
+}
+
+# What TransactionResponse returns; gateway_response is only read when asked for
+DEFAULT_TRANSACTION_FIELDS = [field for field in TRANSACTION_FIELD_COLUMNS if field != 'gateway_response']
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Field names from a comma-separated fields= parameter; None when not given"""
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in TRANSACTION_FIELD_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names
+
+
+def transaction_columns(fields: Optional[List[str]] = None, required: tuple = ()) -> str:
+    """Select list for the given fields (default: the TransactionResponse fields) plus required ones"""
+    names = dict.fromkeys([*(fields or DEFAULT_TRANSACTION_FIELDS), *required])
+    return ", ".join(TRANSACTION_FIELD_COLUMNS[name] for name in names)
+
+
+TRANSACTION_COLUMNS = transaction_columns()
+
+
+def select_transaction_sql(columns: str = TRANSACTION_COLUMNS) -> str:
+    """
+    Lookup by transaction_id. transactions is partitioned by created_at, so it
+    joins through the transaction_ids registry, whose row is read first as a
+    constant and lets the optimizer prune the transactions probe to one partition
+    """
+    return f"""
+        SELECT {columns}
+        FROM transaction_ids r
+        JOIN transactions t ON t.transaction_id = r.transaction_id AND t.created_at = r.created_at
+        WHERE r.transaction_id = %s
+    """
+
+
+def select_archived_transaction_sql(columns: str = TRANSACTION_COLUMNS) -> str:
+    """Fallback for lookups that miss transactions after the row was archived"""
+    return f"SELECT {columns} FROM transactions_archive t WHERE t.transaction_id = %s"
+
+
+# Hot-path queries, kept here so check_query_plans.py can EXPLAIN exactly what runs
+SELECT_TRANSACTION_SQL = select_transaction_sql()
+
+LOCK_TRANSACTION_SQL = """
+    SELECT t.gateway, t.payment_mode, t.status, t.created_at
+    FROM transaction_ids r
+    JOIN transactions t ON t.transaction_id = r.transaction_id AND t.created_at = r.created_at
+    WHERE r.transaction_id = %s
+    FOR UPDATE
+"""
+
+SELECT_ARCHIVED_TRANSACTION_SQL = select_archived_transaction_sql()
+
+REGISTER_TRANSACTION_SQL = """
+    INSERT INTO transaction_ids (transaction_id, created_at) VALUES (%s, %s)
+"""
+
+INSERT_TRANSACTION_SQL = """
+    INSERT INTO transactions
+    (transaction_id, gateway, payment_mode, base_amount, fee_amount, total_amount, status, created_at, updated_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+SUCCESS_RATES_SQL = """
+    SELECT
+        gateway,
+        payment_mode,
+        SUM(total_transactions) as total_transactions,
+        SUM(successful_transactions) as successful_transactions,
+        SUM(successful_transactions) / SUM(total_transactions) * 100 as success_rate,
+        SUM(failed_transactions) as failed_transactions,
+        SUM(pending_transactions) as pending_transactions,
+        MAX(last_transaction) as last_transaction
+    FROM transaction_rollups
+    WHERE bucket_hour >= %s
+    GROUP BY gateway, payment_mode
+    HAVING SUM(total_transactions) > 0
+    ORDER BY success_rate DESC, total_transactions DESC
+"""
+
+GATEWAY_SUCCESS_RATES_SQL = """
+    SELECT
+        payment_mode,
+        SUM(total_transactions) as total_transactions,
+        SUM(successful_transactions) as successful_transactions,
+        SUM(successful_transactions) / SUM(total_transactions) * 100 as success_rate
+    FROM transaction_rollups
+    WHERE gateway = %s AND bucket_hour >= %s
+    GROUP BY payment_mode
+    HAVING SUM(total_transactions) > 0
+    ORDER BY success_rate DESC
+"""
+
+
+def build_success_rate_lookup(pairs: List[tuple[str, str]], days: int) -> tuple[str, tuple]:
+    """Query summing the rollup buckets of many (gateway, mode) pairs over the last N days"""
+    placeholders = ", ".join(["(%s, %s)"] * len(pairs))
+    params = [value for pair in pairs for value in pair]
+    params.append(window_start(days))
+
+    query = f"""
+        SELECT
+            gateway,
+            payment_mode,
+            SUM(successful_transactions) / SUM(total_transactions) * 100 as success_rate
+        FROM transaction_rollups
+        WHERE (gateway, payment_mode) IN ({placeholders})
+        AND bucket_hour >= %s
+        GROUP BY gateway, payment_mode
+    """
+    return query, tuple(params)
+
+
+def build_list_transactions_query(status: Optional[str], limit: Optional[int], since: Optional[datetime] = None,
+                                  after: Optional[tuple[datetime, int]] = None,
+                                  columns: str = TRANSACTION_COLUMNS) -> tuple[str, tuple]:
+    """
+    Query for the newest transactions, optionally filtered by status and created_at >= since.
+    after = (created_at, id) of the last row of the previous page continues from there.
+    """
+    query = f"SELECT {columns} FROM transactions t"
+    conditions = []
+    params = []
+
+    if status:
+        conditions.append("t.status = %s")
+        params.append(status)
+    if since:
+        # A literal bound (not NOW() arithmetic) lets the optimizer prune older partitions
+        conditions.append("t.created_at >= %s")
+        params.append(since)
+    if after:
+        # Keyset on (created_at, id); the bare created_at bound is what the index range and pruning use
+        conditions.append("t.created_at <= %s AND (t.created_at < %s OR t.id < %s)")
+        params.extend([after[0], after[0], after[1]])
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    query += " ORDER BY t.created_at DESC, t.id DESC"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    return query, tuple(params)
+
+
+def encode_page_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque continuation token for the rows after (created_at, id)"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_page_cursor(token: str) -> tuple[datetime, int]:
+    """Position encoded by encode_page_cursor; raises a 400 for anything else"""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def json_default(value):
+    """json.dumps fallback matching FastAPI's datetime encoding"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def transaction_from_row(row: dict, fields: Optional[List[str]] = None) -> dict:
+    """Replace the paise columns of a transactions row with rupee amounts, keeping only fields if given"""
+    for field in ('base_amount', 'fee_amount', 'total_amount'):
+        paise = field.replace('amount', 'paise')
+        if paise in row:
+            row[field] = to_rupees(row.pop(paise))
+    if fields:
+        return {field: row[field] for field in fields}
+    return row
+
+
+def calculate_fee(amount: int, payment_mode: str, gateway: Optional[str] = None) -> tuple[int, int, float]:
+    """Calculate fee based on gateway, payment mode and amount; amounts are in paise"""
+    with metrics.span("calculate_fee"):
+        return pricing.current.fee_engine.calculate(amount, payment_mode, gateway)
 
 
 @app.get("/")
-def health():
+async def health():
     return {"status": "healthy", "message": "Payment Orchestration MVP is running"}
 
 
-def get_success_rate_from_db(gateway: str, payment_mode: str) -> float:
-    """Get success rate for a (gateway, mode) pair from database"""
+@app.get("/api/pool-stats")
+async def get_pool_stats():
+    """Connection pool occupancy and checkout wait time histogram"""
+    return {"mode": request_db_pool.mode, **request_db_pool.stats()}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Request and span latency histograms in the Prometheus text format"""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/admin/query-stats", dependencies=[Depends(require_admin)])
+async def get_query_stats(limit: int = Query(20, ge=1, le=500), order_by: str = "total_ms"):
+    """Heaviest statement fingerprints and the most recent slow statements"""
+    if order_by not in ORDER_KEYS:
+        raise HTTPException(status_code=400, detail=f"order_by must be one of {', '.join(ORDER_KEYS)}")
+    return {
+        **query_stats.stats(),
+        "top": query_stats.top(limit, order_by),
+        "slow": query_stats.slow_queries(),
+    }
+
+
+@app.post("/api/admin/query-stats/reset", dependencies=[Depends(require_admin)])
+async def reset_query_stats():
+    query_stats.reset()
+    return {"message": "Query statistics reset"}
+
+
+def route_handler_code(path: str, method: Optional[str] = None):
+    """Code object of the endpoint function serving path (and method, if several do)"""
+    routes = [route for route in app.routes
+              if getattr(route, "path", None) == path and getattr(route, "endpoint", None) is not None
+              and (method is None or method.upper() in getattr(route, "methods", ()))]
+    if not routes:
+        raise HTTPException(status_code=404, detail=f"No route {method + ' ' if method else ''}{path}")
+    if len(routes) > 1:
+        raise HTTPException(status_code=400, detail=f"Several routes serve {path}; pass method")
+    return inspect.unwrap(routes[0].endpoint).__code__
+
+
+@app.get("/api/admin/profile", dependencies=[Depends(require_admin)])
+async def profile_worker(seconds: float = Query(10, gt=0, le=PROFILER_CONFIG['max_seconds']),
+                         interval_ms: float = Query(PROFILER_CONFIG['interval_ms'], ge=1, le=1000),
+                         route: Optional[str] = None, method: Optional[str] = None, include_idle: bool = False):
+    """
+    Sample this worker's threads for the given seconds and return collapsed stacks
+    (feed to flamegraph.pl or speedscope). Pass route (e.g. /api/checkout, plus
+    method if the path serves several) to keep only stacks running that handler.
+    """
+    match = route_handler_code(route, method) if route else None
+
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
+        result = await run_in_threadpool(profiler.profile, seconds, interval_ms / 1000, match, include_idle)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
-            cursor.execute("""
-                SELECT
-                    SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) / COUNT(*) * 100 as success_rate
-                FROM transactions
-                WHERE gateway = %s AND payment_mode = %s
-                AND created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-            """, (gateway, payment_mode))
+    return Response(result["collapsed"], media_type="text/plain", headers={
+        "X-Profile-Samples": str(result["samples"]),
+        "X-Profile-Matched": str(result["matched"]),
+        "X-Profile-Elapsed": str(result["elapsed"]),
+    })
 
-            result = cursor.fetchone()
 
-            if result and result['success_rate'] is not None:
-                return float(result['success_rate'])
+# Success rate assumed for pairs without recent transactions
+DEFAULT_SUCCESS_RATE = 95.0
 
-            # Default success rate if no data
-            return 95.0
 
-    except Exception as e:
-        print(f"Error fetching success rate: {e}")
-        return 95.0  # Default success rate
+def fetch_success_rates(pairs: List[tuple[str, str]], days: int = 30) -> dict[tuple[str, str], float]:
+    """Query success rates for many (gateway, mode) pairs with a single grouped query; raises on error"""
+    rates = {pair: DEFAULT_SUCCESS_RATE for pair in pairs}
+    if not pairs:
+        return rates
+
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+
+        # Sum hourly rollup buckets instead of rescanning transactions
+        cursor.execute(*build_success_rate_lookup(list(rates), days))
+
+        for row in cursor.fetchall():
+            if row['success_rate'] is not None:
+                rates[(row['gateway'], row['payment_mode'])] = float(row['success_rate'])
+
+    return rates
+
+
+success_rate_cache = SuccessRateCache(
+    loader=fetch_success_rates,
+    default_rate=DEFAULT_SUCCESS_RATE,
+    ttl=SUCCESS_RATE_CACHE_CONFIG['ttl'],
+    stale_ttl=SUCCESS_RATE_CACHE_CONFIG['stale_ttl'],
+    refresh_interval=SUCCESS_RATE_CACHE_CONFIG['refresh_interval'],
+    max_idle=SUCCESS_RATE_CACHE_CONFIG['max_idle'],
+    max_backoff=SUCCESS_RATE_CACHE_CONFIG['max_backoff'],
+)
+
+
+archiver = TransactionArchiver(
+    connection_factory=get_db_connection,
+    min_age_days=ARCHIVE_CONFIG['min_age_days'],
+    batch_size=ARCHIVE_CONFIG['batch_size'],
+    interval=ARCHIVE_CONFIG['interval'],
+    pause=ARCHIVE_CONFIG['pause'],
+)
+
+
+@app.get("/api/pricing")
+async def get_pricing():
+    """Currently active pricing config version and gateway catalog"""
+    return {**pricing.current.describe(), "last_error": pricing.last_error}
+
+
+@app.post("/api/pricing/reload")
+async def reload_pricing():
+    """Reload the pricing config file now instead of waiting for the watcher"""
+    swapped = await run_in_threadpool(pricing.reload)
+    if pricing.last_error and not swapped:
+        raise HTTPException(status_code=422, detail=pricing.last_error)
+    return {"reloaded": swapped, "version": pricing.current.version}
+
+
+@app.get("/api/success-rate-cache/stats")
+async def get_success_rate_cache_stats():
+    """Success rate cache hit/miss/refresh metrics"""
+    return success_rate_cache.stats()
+
+
+@app.get("/api/transaction-cache/stats")
+async def get_transaction_cache_stats():
+    """Hit ratio and size of the get_transaction cache"""
+    return {"enabled": TRANSACTION_CACHE_CONFIG['enabled'], **transaction_cache.stats()}
+
+
+@app.get("/api/archiver/stats")
+async def get_archiver_stats():
+    """Rows moved to transactions_archive and the last archiver run"""
+    return {"enabled": ARCHIVE_CONFIG['enabled'], **archiver.stats()}
 
 
 @app.post("/api/checkout", response_model=CheckoutResponse)
-def create_checkout(request: CheckoutRequest):
+async def create_checkout(request: CheckoutRequest):
     """
     Simple checkout endpoint that shows all payment options with fees.
     Includes recommended option based on lowest fee and highest success rate.
     """
 
     payment_options = []
+    amount = to_paise(request.amount)
+    base_amount = to_rupees(amount)
+
+    # Read the pricing snapshot once so a concurrent reload cannot mix versions
+    config = pricing.current
+    payment_methods = config.payment_methods
+
+    # Success rates come from the in-process cache; the database is never queried inline
+    success_rates = success_rate_cache.get_many(payment_methods, SUCCESS_RATE_CACHE_CONFIG['window_days'])
+
+    # Calculate fees for every option in one batch
+    with metrics.span("calculate_fee"):
+        fees, totals, percentages = config.fee_engine.calculate_fees(
+            [amount] * len(payment_methods),
+            [payment_mode for _, payment_mode in payment_methods],
+            [gateway for gateway, _ in payment_methods]
+        )
 
-    # Define available payment methods
-    payment_methods = [
-        ("Razorpay", "debit_card"),
-        ("Razorpay", "credit_card"),
-        ("Razorpay", "netbanking"),
-        ("Razorpay", "upi"),
-        ("PayU", "debit_card"),
-        ("PayU", "credit_card"),
-        ("PayU", "upi"),
-        ("Cashfree", "debit_card"),
-        ("Cashfree", "upi"),
-    ]
-
-    # Calculate fees for each option and fetch success rates
-    for gateway, payment_mode in payment_methods:
-        fee_amount, total_amount, fee_percentage = calculate_fee(request.amount, payment_mode)
-        success_rate = get_success_rate_from_db(gateway, payment_mode)
-
-        payment_options.append(PaymentOption(
-            gateway=gateway,
-            payment_mode=payment_mode,
-            base_amount=request.amount,
-            fee_amount=round(fee_amount, 2),
-            total_amount=round(total_amount, 2),
-            fee_percentage=fee_percentage,
-            success_rate=round(success_rate, 2)
-        ))
+    with metrics.span("payment_options"):
+        for (gateway, payment_mode), fee, total, fee_percentage in zip(payment_methods, fees, totals, percentages):
+            success_rate = success_rates[(gateway, payment_mode)]
+
+            payment_options.append(PaymentOption(
+                gateway=gateway,
+                payment_mode=payment_mode,
+                base_amount=base_amount,
+                fee_amount=to_rupees(fee),
+                total_amount=to_rupees(total),
+                fee_percentage=fee_percentage,
+                effective_fee_percentage=effective_percentage(fee, amount, fee_percentage),
+                success_rate=round(success_rate, 2)
+            ))
 
     # Find recommended option: lowest fee AND highest success rate
     # Score = (1 / total_amount) * 100 + success_rate
@@ -212,8 +773,7 @@ def create_checkout(request: CheckoutRequest):
 
     for option in payment_options:
         # Calculate score: inverse of total amount (lower is better) + success rate (higher is better)
-        # We get success rate from database
-        success_rate = get_success_rate_from_db(option.gateway, option.payment_mode)
+        success_rate = success_rates[(option.gateway, option.payment_mode)]
 
         # Score: Lower total_amount and higher success_rate is better
         # Normalize: (1 / total_amount * 1000) + success_rate
@@ -223,15 +783,23 @@ def create_checkout(request: CheckoutRequest):
             best_score = score
             best_option = option
 
-    return CheckoutResponse(
-        original_amount=request.amount,
-        payment_options=payment_options,
-        recommended_option=best_option
-    )
+    with metrics.span("response_model"):
+        return CheckoutResponse(
+            original_amount=base_amount,
+            payment_options=payment_options,
+            recommended_option=best_option
+        )
+
+
+def remember_created(created: TransactionResponse, response: Response) -> TransactionResponse:
+    """Cache a committed new transaction and hand its version token to the writer"""
+    if TRANSACTION_CACHE_CONFIG['enabled']:
+        response.headers[TRANSACTION_VERSION_HEADER] = transaction_cache.put(created.transaction_id, created.model_dump())
+    return created
 
 
 @app.post("/api/transactions", response_model=TransactionResponse)
-def create_transaction(transaction: TransactionRequest):
+async def create_transaction(transaction: TransactionRequest, response: Response):
     """
     Create a new transaction record when user selects a payment option.
     This persists the transaction to the database.
@@ -239,69 +807,464 @@ def create_transaction(transaction: TransactionRequest):
 
     transaction_id = transaction.transaction_id if transaction.transaction_id else uuid.uuid4().hex
 
-    # Get current timestamp for created_at and updated_at
-    current_time = datetime.now()
+    if GROUP_COMMIT_CONFIG['enabled']:
+        transaction.transaction_id = transaction_id
+        return remember_created(await create_transaction_grouped(transaction), response)
+
+    # Get current timestamp for created_at and updated_at (TIMESTAMP columns store whole seconds)
+    current_time = datetime.now().replace(microsecond=0)
+
+    base_paise = to_paise(transaction.base_amount)
+    fee_paise = to_paise(transaction.fee_amount)
+    total_paise = to_paise(transaction.total_amount)
 
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
+
+            # Claim the transaction ID first, a duplicate fails here before touching transactions
+            try:
+                await cursor.execute(REGISTER_TRANSACTION_SQL, (transaction_id, current_time))
+            except pymysql.err.IntegrityError:
+                raise HTTPException(status_code=409, detail=f"Transaction {transaction_id} already exists")
 
             # Insert transaction into database
-            cursor.execute("""
-                INSERT INTO transactions
-                (transaction_id, gateway, payment_mode, base_amount, fee_amount, total_amount, status, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
+            await cursor.execute(INSERT_TRANSACTION_SQL, (
                 transaction_id,
                 transaction.gateway,
                 transaction.payment_mode,
-                transaction.base_amount,
-                transaction.fee_amount,
-                transaction.total_amount,
+                to_decimal(base_paise),
+                to_decimal(fee_paise),
+                to_decimal(total_paise),
                 transaction.status,
                 current_time,
                 current_time
             ))
+            row_id = cursor.lastrowid
+
+            # Count the transaction in its success-rate bucket within the same database transaction
+            deltas = RollupDeltas()
+            deltas.insert(transaction.gateway, transaction.payment_mode, transaction.status, current_time)
+            await deltas.apply(cursor)
+
+            await connection.commit()
+
+        # Every column was either sent by us or is the AUTO_INCREMENT id, so the
+        # response is built without reading the row back (MySQL has no RETURNING)
+        with metrics.span("response_model"):
+            created = TransactionResponse(
+                id=row_id,
+                transaction_id=transaction_id,
+                gateway=transaction.gateway,
+                payment_mode=transaction.payment_mode,
+                base_amount=to_rupees(base_paise),
+                fee_amount=to_rupees(fee_paise),
+                total_amount=to_rupees(total_paise),
+                status=transaction.status,
+                gateway_transaction_id=None,
+                created_at=current_time,
+                updated_at=current_time
+            )
+        return remember_created(created, response)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-            # Get the created transaction
-            cursor.execute("""
-                SELECT * FROM transactions WHERE transaction_id = %s
-            """, (transaction_id,))
 
-            result = cursor.fetchone()
-            connection.commit()
+def describe_validation_error(error: ValidationError) -> str:
+    """One-line summary of a pydantic validation error for per-item results"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'item'}: {detail['msg']}"
+        for detail in error.errors()
+    )
 
-            if result:
-                return TransactionResponse(
-                    id=result['id'],
-                    transaction_id=result['transaction_id'],
-                    gateway=result['gateway'],
-                    payment_mode=result['payment_mode'],
-                    base_amount=float(result['base_amount']),
-                    fee_amount=float(result['fee_amount']),
-                    total_amount=float(result['total_amount']),
-                    status=result['status'],
-                    gateway_transaction_id=result.get('gateway_transaction_id'),
-                    created_at=result['created_at'] or current_time,
-                    updated_at=result['updated_at'] or current_time
-                )
-            else:
-                raise HTTPException(status_code=500, detail="Failed to create transaction")
 
+async def iter_bulk_items(request: Request, model=None, max_items: Optional[int] = None):
+    """
+    Yield (index, model instance or error message) from a JSON array or NDJSON body.
+    A JSON array longer than max_items is rejected with 413 before anything is yielded;
+    an NDJSON stream can only be cut short by the caller.
+    """
+    model = model or TransactionRequest
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        # Validate lines as they arrive so chunks are inserted while the body is still streaming
+        index = 0
+        buffer = b""
+        async for block in request.stream():
+            buffer += block
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    try:
+                        yield index, model.model_validate_json(line)
+                    except ValidationError as e:
+                        yield index, describe_validation_error(e)
+                    index += 1
+        if buffer.strip():
+            try:
+                yield index, model.model_validate_json(buffer)
+            except ValidationError as e:
+                yield index, describe_validation_error(e)
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of transactions")
+    if max_items is not None and len(items) > max_items:
+        raise HTTPException(status_code=413, detail=f"At most {max_items} items per request")
+
+    for index, item in enumerate(items):
+        try:
+            yield index, model.model_validate(item)
+        except ValidationError as e:
+            yield index, describe_validation_error(e)
+
+
+async def insert_transaction_chunk(cursor, chunk: List[tuple[int, TransactionRequest]]) -> list[dict]:
+    """Insert validated transactions in the caller's database transaction; returns per-item results"""
+    current_time = datetime.now().replace(microsecond=0)
+    transaction_ids = [transaction.transaction_id for _, transaction in chunk]
+    placeholders = ", ".join(["%s"] * len(transaction_ids))
+
+    # Skip IDs that already exist instead of failing the whole chunk on the registry's primary key
+    await cursor.execute(
+        f"SELECT transaction_id FROM transaction_ids WHERE transaction_id IN ({placeholders})",
+        tuple(transaction_ids)
+    )
+    seen = {row['transaction_id'] for row in await cursor.fetchall()}
+
+    results = []
+    new_rows = []
+    deltas = RollupDeltas()
+    for index, transaction in chunk:
+        if transaction.transaction_id in seen:
+            results.append({"index": index, "transaction_id": transaction.transaction_id, "result": "duplicate"})
+            continue
+        seen.add(transaction.transaction_id)
+
+        new_rows.append((
+            transaction.transaction_id,
+            transaction.gateway,
+            transaction.payment_mode,
+            to_decimal(to_paise(transaction.base_amount)),
+            to_decimal(to_paise(transaction.fee_amount)),
+            to_decimal(to_paise(transaction.total_amount)),
+            transaction.status,
+            current_time,
+            current_time
+        ))
+        deltas.insert(transaction.gateway, transaction.payment_mode, transaction.status, current_time)
+        results.append({"index": index, "transaction_id": transaction.transaction_id, "result": "created",
+                        "created_at": current_time})
+
+    if not new_rows:
+        return results
+
+    # executemany sends these as multi-row INSERT statements
+    await cursor.executemany(REGISTER_TRANSACTION_SQL, [(row[0], current_time) for row in new_rows])
+    await cursor.executemany(INSERT_TRANSACTION_SQL, new_rows)
+    await deltas.apply(cursor)
+
+    # Multi-row inserts don't report every id; the shared created_at keeps this to one partition
+    placeholders = ", ".join(["%s"] * len(new_rows))
+    await cursor.execute(
+        f"SELECT id, transaction_id FROM transactions WHERE transaction_id IN ({placeholders}) AND created_at = %s",
+        (*(row[0] for row in new_rows), current_time)
+    )
+    row_ids = {row['transaction_id']: row['id'] for row in await cursor.fetchall()}
+    for result in results:
+        if result["result"] == "created":
+            result["id"] = row_ids.get(result["transaction_id"])
+
+    return results
+
+
+@app.post("/api/transactions/bulk")
+async def create_transactions_bulk(request: Request):
+    """
+    Create many transactions from a JSON array or an NDJSON stream (Content-Type: application/x-ndjson).
+    Items are validated individually and inserted in chunks of BULK_INSERT_CONFIG['chunk_size'], each
+    committed on its own. IDs that already exist are reported as duplicates, so a failed request can
+    simply be sent again. A JSON array over max_items is rejected up front; an NDJSON stream is cut
+    off after max_items and answered with truncated=true and the results of the items written.
+    """
+
+    chunk_size = BULK_INSERT_CONFIG['chunk_size']
+    max_items = BULK_INSERT_CONFIG['max_items']
+    results = []
+    chunk = []
+    count = 0
+    truncated = False
+
+    async def flush():
+        # A connection is only held while a chunk is written, not while the body streams in
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
+            for attempt in range(2):
+                try:
+                    results.extend(await insert_transaction_chunk(cursor, chunk))
+                    await connection.commit()
+                    break
+                except pymysql.err.IntegrityError as e:
+                    # Another request registered one of these IDs after the duplicate check
+                    await connection.rollback()
+                    if attempt:
+                        results.extend({"index": index, "transaction_id": transaction.transaction_id,
+                                        "result": "error", "error": str(e)} for index, transaction in chunk)
+        chunk.clear()
+
+    try:
+        async for index, item in iter_bulk_items(request, max_items=max_items):
+            count += 1
+            if count > max_items:
+                truncated = True
+                break
+
+            if isinstance(item, str):
+                results.append({"index": index, "result": "invalid", "error": item})
+                continue
+            if not item.transaction_id:
+                item.transaction_id = uuid.uuid4().hex
+
+            chunk.append((index, item))
+            if len(chunk) >= chunk_size:
+                await flush()
+
+        if chunk:
+            await flush()
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    results.sort(key=lambda result: result["index"])
+    summary = {"created": 0, "duplicate": 0, "invalid": 0, "error": 0}
+    for result in results:
+        summary[result["result"]] += 1
+
+    return {**summary, "count": len(results), "truncated": truncated, "results": results}
+
+
+async def apply_status_chunk(cursor, chunk: List[TransactionStatusUpdate]) -> list[str]:
+    """
+    Apply status updates in the caller's database transaction with one UPDATE ... CASE statement.
+    Later updates to the same transaction win. Returns the transaction IDs that were not found.
+    """
+    # Fold repeated IDs the way applying them one by one would
+    merged = {}
+    for update in chunk:
+        fields = merged.setdefault(update.transaction_id, {})
+        fields['status'] = update.status
+        if update.gateway_transaction_id:
+            fields['gateway_transaction_id'] = update.gateway_transaction_id
+        if update.gateway_response:
+            fields['gateway_response'] = update.gateway_response
+
+    placeholders = ", ".join(["%s"] * len(merged))
+    # Lock the rows so the rollup adjustments see the statuses being replaced
+    await cursor.execute(f"""
+        SELECT t.id, t.transaction_id, t.gateway, t.payment_mode, t.status, t.created_at
+        FROM transaction_ids r
+        JOIN transactions t ON t.transaction_id = r.transaction_id AND t.created_at = r.created_at
+        WHERE r.transaction_id IN ({placeholders})
+        FOR UPDATE
+    """, tuple(merged))
+    current = {row['transaction_id']: row for row in await cursor.fetchall()}
+    not_found = [transaction_id for transaction_id in merged if transaction_id not in current]
+    if not current:
+        return not_found
+
+    # CASE on the integer id, with only the columns some update actually sets
+    assignments = []
+    params = []
+    for column in ('status', 'gateway_transaction_id', 'gateway_response'):
+        cases = [(current[transaction_id]['id'], fields[column])
+                 for transaction_id, fields in merged.items()
+                 if transaction_id in current and column in fields]
+        if cases:
+            assignments.append(f"{column} = CASE id {' '.join(['WHEN %s THEN %s'] * len(cases))} ELSE {column} END")
+            params.extend(value for case in cases for value in case)
+    assignments.append("updated_at = CURRENT_TIMESTAMP")
+
+    rows = list(current.values())
+    # created_at IN (...) prunes the statement to the partitions holding these rows
+    params.extend(row['id'] for row in rows)
+    created = sorted({row['created_at'] for row in rows})
+    params.extend(created)
+    await cursor.execute(f"""
+        UPDATE transactions
+        SET {', '.join(assignments)}
+        WHERE id IN ({', '.join(['%s'] * len(rows))})
+        AND created_at IN ({', '.join(['%s'] * len(created))})
+    """, tuple(params))
+
+    deltas = RollupDeltas()
+    for row in rows:
+        deltas.status_change(row['gateway'], row['payment_mode'], row['created_at'],
+                             row['status'], merged[row['transaction_id']]['status'])
+    await deltas.apply(cursor)
+
+    return not_found
+
+
+@app.post("/api/transactions/bulk-status")
+async def update_transactions_bulk(request: Request):
+    """
+    Apply settlement status changes from a JSON array or NDJSON stream of
+    {transaction_id, status, gateway_transaction_id, gateway_response} records.
+    Updates are applied in chunks of BULK_UPDATE_CONFIG['chunk_size'], each committed on its own;
+    applying the same file twice leaves the same final state. A JSON array over max_items is rejected
+    up front; an NDJSON stream is cut off after max_items and answered with truncated=true.
+    """
+
+    max_items = BULK_UPDATE_CONFIG['max_items']
+    chunk = []
+    count = 0
+    updated = 0
+    not_found = []
+    invalid = []
+    truncated = False
+
+    async def flush():
+        nonlocal updated
+        # A connection is only held while a chunk is applied, not while the body streams in
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
+            missing = await apply_status_chunk(cursor, chunk)
+            await connection.commit()
+        if TRANSACTION_CACHE_CONFIG['enabled']:
+            for update in chunk:
+                transaction_cache.invalidate(update.transaction_id)
+        missing_ids = set(missing)
+        for update in chunk:
+            if update.transaction_id not in missing_ids:
+                status_events.publish(update.transaction_id, update.status)
+        updated += sum(1 for update in chunk if update.transaction_id not in missing_ids)
+        not_found.extend(missing)
+        chunk.clear()
+
+    try:
+        async for index, item in iter_bulk_items(request, TransactionStatusUpdate, max_items):
+            count += 1
+            if count > max_items:
+                truncated = True
+                break
+
+            if isinstance(item, str):
+                invalid.append({"index": index, "error": item})
+                continue
+
+            chunk.append(item)
+            if len(chunk) >= BULK_UPDATE_CONFIG['chunk_size']:
+                await flush()
+
+        if chunk:
+            await flush()
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    return {
+        "updated": updated,
+        "not_found": len(not_found),
+        "invalid": len(invalid),
+        "truncated": truncated,
+        "not_found_ids": not_found,
+        "invalid_items": invalid,
+    }
+
+
+async def flush_transaction_batch(batch: List[TransactionRequest]) -> list:
+    """Group commit flush: insert a batch of transactions in one database transaction"""
+    chunk = list(enumerate(batch))
+    try:
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
+            return await insert_transaction_chunk(cursor, chunk)
+    except pymysql.err.IntegrityError:
+        # Another writer registered one of these IDs after the duplicate check; check again
+        pass
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Database error: {e}")
+
+    # Insert one by one so a single bad row doesn't fail the rest of its batch
+    results = []
+    for item in chunk:
+        try:
+            async with get_async_db_connection() as connection:
+                cursor = await connection.cursor()
+                results.extend(await insert_transaction_chunk(cursor, [item]))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+group_commit = GroupCommitWriter(
+    flush=flush_transaction_batch,
+    max_batch=GROUP_COMMIT_CONFIG['max_batch'],
+    max_delay=GROUP_COMMIT_CONFIG['max_delay_ms'] / 1000,
+    max_pending=GROUP_COMMIT_CONFIG['max_pending'],
+)
+
+
+@app.get("/api/group-commit/stats")
+async def get_group_commit_stats():
+    """Batch sizes and flush times of the group commit writer"""
+    return {"enabled": GROUP_COMMIT_CONFIG['enabled'], **group_commit.stats()}
+
+
+async def create_transaction_grouped(transaction: TransactionRequest) -> TransactionResponse:
+    """Insert through the group commit writer; returns once the batch holding it is committed"""
+    try:
+        result = await group_commit.submit(transaction)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Too many pending transaction inserts",
+                            headers={"Retry-After": "1"})
+
+    if isinstance(result, HTTPException):
+        raise result
+    if isinstance(result, Exception):
+        raise HTTPException(status_code=500, detail=f"Database error: {str(result)}")
+    if result["result"] == "duplicate":
+        raise HTTPException(status_code=409, detail=f"Transaction {transaction.transaction_id} already exists")
+
+    return TransactionResponse(
+        id=result["id"],
+        transaction_id=transaction.transaction_id,
+        gateway=transaction.gateway,
+        payment_mode=transaction.payment_mode,
+        base_amount=to_rupees(to_paise(transaction.base_amount)),
+        fee_amount=to_rupees(to_paise(transaction.fee_amount)),
+        total_amount=to_rupees(to_paise(transaction.total_amount)),
+        status=transaction.status,
+        gateway_transaction_id=None,
+        created_at=result["created_at"],
+        updated_at=result["created_at"]
+    )
+
 
 @app.put("/api/transactions/{transaction_id}")
-def update_transaction(transaction_id: str, status: str, gateway_transaction_id: Optional[str] = None, gateway_response: Optional[str] = None):
+async def update_transaction(transaction_id: str, status: str, response: Response, gateway_transaction_id: Optional[str] = None, gateway_response: Optional[str] = None):
     """
     Update transaction status (e.g., when payment succeeds or fails).
     Use this after processing the payment with the gateway.
     """
 
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
 
             # Update transaction
             update_fields = []
@@ -318,133 +1281,321 @@ def update_transaction(transaction_id: str, status: str, gateway_transaction_id:
                 params.append(gateway_response)
 
             if update_fields:
+                # Lock the row so the rollup adjustment sees the status being replaced
+                await cursor.execute(LOCK_TRANSACTION_SQL, (transaction_id,))
+
+                current = await cursor.fetchone()
+                if not current:
+                    raise HTTPException(status_code=404, detail="Transaction not found")
+
                 update_fields.append("updated_at = CURRENT_TIMESTAMP")
                 params.append(transaction_id)
+                params.append(current['created_at'])
 
-                cursor.execute(f"""
+                # created_at confines the update to the row's partition
+                await cursor.execute(f"""
                     UPDATE transactions
                     SET {', '.join(update_fields)}
-                    WHERE transaction_id = %s
+                    WHERE transaction_id = %s AND created_at = %s
                 """, tuple(params))
 
-                connection.commit()
+                # Move the transaction between status counters in its success-rate bucket
+                if status:
+                    deltas = RollupDeltas()
+                    deltas.status_change(current['gateway'], current['payment_mode'], current['created_at'],
+                                         current['status'], status)
+                    await deltas.apply(cursor)
 
-                if cursor.rowcount > 0:
-                    return {"message": "Transaction updated successfully", "transaction_id": transaction_id}
-                else:
-                    raise HTTPException(status_code=404, detail="Transaction not found")
+                await connection.commit()
+
+                # After the commit, so a concurrent read can't cache the old row again
+                if TRANSACTION_CACHE_CONFIG['enabled']:
+                    response.headers[TRANSACTION_VERSION_HEADER] = transaction_cache.invalidate(transaction_id)
+                if status:
+                    status_events.publish(transaction_id, status)
+
+                return {"message": "Transaction updated successfully", "transaction_id": transaction_id}
             else:
                 raise HTTPException(status_code=400, detail="No fields to update")
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
 @app.get("/api/transactions/{transaction_id}", response_model=TransactionResponse)
-def get_transaction(transaction_id: str):
-    """Get transaction details by transaction ID"""
+async def get_transaction(transaction_id: str, fields: Optional[str] = None,
+                          version: Optional[str] = Header(None, alias=TRANSACTION_VERSION_HEADER)):
+    """
+    Get transaction details by transaction ID.
+    Pass fields (comma-separated, e.g. fields=status,total_amount) to read and return only those.
+    Send back the X-Transaction-Version header from a create or update to be sure to see that write.
+    """
+
+    selected = parse_fields(fields)
+    cacheable = TRANSACTION_CACHE_CONFIG['enabled'] and all(
+        field in DEFAULT_TRANSACTION_FIELDS for field in selected or ())
+
+    if cacheable:
+        cached = transaction_cache.get(transaction_id, version)
+        if cached is not None:
+            if selected:
+                return JSONResponse(jsonable_encoder({field: cached[field] for field in selected}))
+            with metrics.span("response_model"):
+                return TransactionResponse(**cached)
+        read_sequence = transaction_cache.begin_read()
 
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
 
-            cursor.execute("""
-                SELECT * FROM transactions WHERE transaction_id = %s
-            """, (transaction_id,))
+            if selected:
+                columns = transaction_columns(selected)
+                await cursor.execute(select_transaction_sql(columns), (transaction_id,))
+            else:
+                await cursor.execute(SELECT_TRANSACTION_SQL, (transaction_id,))
+
+            result = await cursor.fetchone()
 
-            result = cursor.fetchone()
+            if not result:
+                # Settled transactions move to the archive once they age out
+                if selected:
+                    await cursor.execute(select_archived_transaction_sql(columns), (transaction_id,))
+                else:
+                    await cursor.execute(SELECT_ARCHIVED_TRANSACTION_SQL, (transaction_id,))
+                result = await cursor.fetchone()
 
+            if result and selected:
+                # A partial transaction doesn't fit TransactionResponse
+                return JSONResponse(jsonable_encoder(transaction_from_row(result, selected)))
             if result:
-                return TransactionResponse(
-                    id=result['id'],
-                    transaction_id=result['transaction_id'],
-                    gateway=result['gateway'],
-                    payment_mode=result['payment_mode'],
-                    base_amount=float(result['base_amount']),
-                    fee_amount=float(result['fee_amount']),
-                    total_amount=float(result['total_amount']),
-                    status=result['status'],
-                    gateway_transaction_id=result.get('gateway_transaction_id'),
-                    created_at=result['created_at'],
-                    updated_at=result['updated_at']
-                )
+                result = transaction_from_row(result)
+                if cacheable:
+                    transaction_cache.put_if_unchanged(transaction_id, result, read_sequence)
+                with metrics.span("response_model"):
+                    return TransactionResponse(
+                        id=result['id'],
+                        transaction_id=result['transaction_id'],
+                        gateway=result['gateway'],
+                        payment_mode=result['payment_mode'],
+                        base_amount=result['base_amount'],
+                        fee_amount=result['fee_amount'],
+                        total_amount=result['total_amount'],
+                        status=result['status'],
+                        gateway_transaction_id=result.get('gateway_transaction_id'),
+                        created_at=result['created_at'],
+                        updated_at=result['updated_at']
+                    )
             else:
                 raise HTTPException(status_code=404, detail="Transaction not found")
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+async def stream_transactions_ndjson(query: str, params: tuple, fields: Optional[List[str]] = None):
+    """Yield NDJSON chunks of transactions read through an unbuffered cursor, in constant memory"""
+    async with get_async_db_connection() as connection:
+        cursor = await streaming_cursor(connection)
+        await cursor.execute(query, params)
+
+        while True:
+            rows = await cursor.fetchmany(LIST_TRANSACTIONS_CONFIG['stream_batch_size'])
+            if not rows:
+                break
+            yield "".join(json.dumps(transaction_from_row(row, fields), default=json_default) + "\n"
+                          for row in rows)
+
+
+async def prepend(first: str, rest):
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
 @app.get("/api/transactions")
-def list_transactions(status: Optional[str] = None, limit: int = 50):
-    """List all transactions, optionally filtered by status"""
+async def list_transactions(status: Optional[str] = None, limit: Optional[int] = Query(None, ge=1),
+                            days: Optional[int] = Query(None, ge=1),
+                            page_cursor: Optional[str] = Query(None, alias="cursor"), format: str = "json",
+                            fields: Optional[str] = None):
+    """
+    List transactions newest first, optionally filtered by status.
+    Pass days to only list transactions from the last N days, which skips older partitions.
 
-    try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
+    format=json returns one page (limit, default 50, at most 1000) and a next_cursor to pass as
+    cursor for the following page. format=ndjson streams every matching row (or limit rows).
+    fields (comma-separated) limits the columns read and returned.
+    """
 
-            query = "SELECT * FROM transactions"
-            params = []
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+
+    since = datetime.now().replace(microsecond=0) - timedelta(days=days) if days else None
+    after = decode_page_cursor(page_cursor) if page_cursor else None
+    selected = parse_fields(fields)
+    # The page cursor needs created_at and id even when they aren't returned
+    columns = transaction_columns(selected, required=('id', 'created_at')) if selected else TRANSACTION_COLUMNS
+
+    if format == "ndjson":
+        query, params = build_list_transactions_query(status, limit, since, after, columns)
+        stream = stream_transactions_ndjson(query, params, selected)
+        # Read the first batch here so connection and query errors still get a proper status code
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+        return StreamingResponse(prepend(first, stream), media_type="application/x-ndjson")
+
+    page_size = min(limit or LIST_TRANSACTIONS_CONFIG['default_limit'], LIST_TRANSACTIONS_CONFIG['max_limit'])
 
-            if status:
-                query += " WHERE status = %s"
-                params.append(status)
+    try:
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
+
+            # One extra row tells whether there is a next page
+            await cursor.execute(*build_list_transactions_query(status, page_size + 1, since, after, columns))
+            rows = await cursor.fetchall()
 
-            query += " ORDER BY created_at DESC LIMIT %s"
-            params.append(limit)
+            next_cursor = None
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                next_cursor = encode_page_cursor(rows[-1]['created_at'], rows[-1]['id'])
 
-            cursor.execute(query, tuple(params))
-            results = cursor.fetchall()
+            results = [transaction_from_row(row, selected) for row in rows]
 
-            return {"transactions": results, "count": len(results)}
+            return {"transactions": results, "count": len(results), "next_cursor": next_cursor}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
+async def read_status(transaction_id: str) -> str:
+    """Current status of a transaction through the read cache; raises a 404 if it doesn't exist"""
+    return (await get_transaction(transaction_id, None, None)).status
+
+
+def format_status_event(transaction_id: str, status: str) -> str:
+    return f"event: status\ndata: {json.dumps({'transaction_id': transaction_id, 'status': status})}\n\n"
+
+
+@app.get("/api/status-events/stats")
+async def get_status_events_stats():
+    """Parked long-poll and SSE subscribers and published status changes"""
+    return status_events.stats()
+
+
+@app.get("/api/transactions/{transaction_id}/wait")
+async def wait_for_status_change(transaction_id: str, status: Optional[str] = None,
+                                 timeout: float = Query(30, ge=0, le=STATUS_EVENTS_CONFIG['max_wait'])):
+    """
+    Long-poll for a status change instead of polling GET /api/transactions/{transaction_id}.
+    Pass the status the client already has: the request returns as soon as the transaction's
+    status differs from it, or after timeout seconds (at most 60) with the current status.
+    """
+
+    try:
+        # Subscribe before reading so a change made in between is still delivered
+        with status_events.subscription(transaction_id) as queue:
+            current = await read_status(transaction_id)
+            if status is None or current != status:
+                return {"transaction_id": transaction_id, "status": current, "changed": status is not None}
+
+            deadline = asyncio.get_running_loop().time() + timeout
+            try:
+                while current == status:
+                    current = await asyncio.wait_for(queue.get(), deadline - asyncio.get_running_loop().time())
+            except asyncio.TimeoutError:
+                # The change may have been made through another worker
+                current = await read_status(transaction_id)
+
+            return {"transaction_id": transaction_id, "status": current, "changed": current != status}
+
+    except SubscriberLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+async def status_event_stream(transaction_id: str):
+    """SSE stream of a transaction's status: the current one, then every change"""
+    with status_events.subscription(transaction_id) as queue:
+        status = await read_status(transaction_id)
+        yield "retry: 1000\n" + format_status_event(transaction_id, status)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + STATUS_EVENTS_CONFIG['max_stream']
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                new_status = await asyncio.wait_for(queue.get(), min(STATUS_EVENTS_CONFIG['resync_interval'], remaining))
+            except asyncio.TimeoutError:
+                # Pick up changes made through another worker
+                try:
+                    new_status = await read_status(transaction_id)
+                except Exception as e:
+                    print(f"Error resyncing status of {transaction_id}: {e}")
+                    new_status = status
+
+            if new_status != status:
+                status = new_status
+                yield format_status_event(transaction_id, status)
+            else:
+                yield ": keepalive\n\n"
+
+
+@app.get("/api/transactions/{transaction_id}/events")
+async def stream_status_events(transaction_id: str):
+    """Server-sent events (text/event-stream) with the transaction's status and each change to it"""
+
+    stream = status_event_stream(transaction_id)
+    # Read the current status here so a missing transaction or a full server gets a proper status code
+    try:
+        first = await stream.__anext__()
+    except SubscriberLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    return StreamingResponse(prepend(first, stream), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
 @app.get("/api/calculate-fee")
-def get_fee(amount: float, payment_mode: str):
-    """Calculate fee for a specific payment mode"""
-    fee_amount, total_amount, fee_percentage = calculate_fee(amount, payment_mode)
+async def get_fee(amount: Decimal, payment_mode: str, gateway: Optional[str] = None):
+    """Calculate fee for a specific payment mode, optionally with a gateway's own schedule"""
+    amount = to_paise(amount)
+    fee, total, fee_percentage = calculate_fee(amount, payment_mode, gateway)
 
     return {
-        "amount": amount,
+        "amount": to_rupees(amount),
+        "gateway": gateway,
         "payment_mode": payment_mode,
-        "fee_amount": round(fee_amount, 2),
-        "total_amount": round(total_amount, 2),
-        "fee_percentage": fee_percentage
+        "fee_amount": to_rupees(fee),
+        "total_amount": to_rupees(total),
+        "fee_percentage": fee_percentage,
+        "effective_fee_percentage": effective_percentage(fee, amount, fee_percentage)
     }
 
 
 @app.get("/api/success-rates")
-def get_success_rates(days: int = 30):
+async def get_success_rates(days: int = 30):
     """
     Calculate success rates for each (gateway, payment_mode) pair.
     Returns statistics for the last N days.
     """
 
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
-
-            # Calculate success rates grouped by gateway and payment_mode
-            cursor.execute("""
-                SELECT
-                    gateway,
-                    payment_mode,
-                    COUNT(*) as total_transactions,
-                    SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as successful_transactions,
-                    SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) / COUNT(*) * 100 as success_rate,
-                    SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END) as failed_transactions,
-                    SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending_transactions,
-                    MAX(created_at) as last_transaction
-                FROM transactions
-                WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-                GROUP BY gateway, payment_mode
-                ORDER BY success_rate DESC, total_transactions DESC
-            """, (days,))
-
-            results = cursor.fetchall()
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
+
+            # Calculate success rates grouped by gateway and payment_mode from the hourly rollups
+            await cursor.execute(SUCCESS_RATES_SQL, (window_start(days),))
+
+            results = await cursor.fetchall()
 
             # Format results
             success_rates = []
@@ -466,33 +1617,25 @@ def get_success_rates(days: int = 30):
                 "success_rates": success_rates
             }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 
 @app.get("/api/success-rates/{gateway}")
-def get_gateway_success_rates(gateway: str, days: int = 30):
+async def get_gateway_success_rates(gateway: str, days: int = 30):
     """
     Get success rates for a specific gateway across all payment modes.
     """
 
     try:
-        with get_db_connection() as connection:
-            cursor = connection.cursor()
-
-            cursor.execute("""
-                SELECT
-                    payment_mode,
-                    COUNT(*) as total_transactions,
-                    SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as successful_transactions,
-                    SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) / COUNT(*) * 100 as success_rate
-                FROM transactions
-                WHERE gateway = %s AND created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-                GROUP BY payment_mode
-                ORDER BY success_rate DESC
-            """, (gateway, days))
-
-            results = cursor.fetchall()
+        async with get_async_db_connection() as connection:
+            cursor = await connection.cursor()
+
+            await cursor.execute(GATEWAY_SUCCESS_RATES_SQL, (gateway, window_start(days)))
+
+            results = await cursor.fetchall()
 
             rates = []
             for row in results:
@@ -509,6 +1652,8 @@ def get_gateway_success_rates(gateway: str, days: int = 30):
                 "payment_modes": rates
             }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
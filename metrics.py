@@ -0,0 +1,165 @@
+"""
+In-process latency histograms exported in the Prometheus text format.
+
+MetricsMiddleware times every HTTP request by method, route template and
+status. Code on the request path wraps steps of interest in
+metrics.span(name). Each span is labelled with the route of the request it
+ran in ("background" outside a request), so a route's latency breaks down
+into pool wait, statement time, fee computation, model construction and so
+on. The route comes from the ASGI scope, which the router fills in once it
+has matched.
+
+When disabled, span() returns a shared no-op context manager and the
+middleware passes requests straight through.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS_SECONDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# ASGI scope of the request being handled, set by MetricsMiddleware
+_current_scope = ContextVar("metrics_scope", default=None)
+
+_NO_SPAN = nullcontext()
+
+
+def current_route() -> str:
+    """Route template of the request being handled, "unmatched" before routing, "background" outside requests"""
+    scope = _current_scope.get()
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+class Histogram:
+    """Latency histogram with fixed buckets; callers provide locking"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_SECONDS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_SECONDS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe_span(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_histograms(lines: list, name: str, help_text: str, label_names: tuple, histograms: dict):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for labels, histogram in sorted(histograms.items()):
+        label_text = ",".join(f'{label}="{_escape(value)}"' for label, value in zip(label_names, labels))
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS_SECONDS + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{label_text}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{label_text}}} {histogram.count}")
+
+
+class Metrics:
+    """Request and span latency histograms for one process"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # (method, route, status) -> Histogram
+        self._requests = {}
+        # (route, span) -> Histogram
+        self._spans = {}
+
+    def span(self, name: str):
+        """Context manager timing its block as the named span of the current route"""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name)
+
+    def observe_span(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        key = (current_route(), name)
+        with self._lock:
+            histogram = self._spans.get(key)
+            if histogram is None:
+                histogram = self._spans[key] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """All histograms in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            _render_histograms(lines, "http_request_duration_seconds",
+                               "Time from receiving a request to sending the last of its response",
+                               ("method", "route", "status"), self._requests)
+            _render_histograms(lines, "request_span_duration_seconds",
+                               "Time spent in an instrumented step while handling a route",
+                               ("route", "span"), self._spans)
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording http_request_duration_seconds and the route context for spans"""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current_scope.reset(token)
+            route = scope.get("route")
+            self.metrics.observe_request(scope["method"], route.path if route is not None else "unmatched",
+                                         status, time.perf_counter() - started)
@@ -0,0 +1,42 @@
+-- Create the hourly success-rate rollups and backfill them from transactions
+-- Apply with: python provision_db.py migrations/000_transaction_rollups.sql
+-- before 001, which indexes this table. Apply it before deploying the code that
+-- writes rollups: every transaction insert and status change upserts a bucket.
+
+USE payment_orchestration;
+
+-- idx_gateway_bucket is added by 001
+CREATE TABLE IF NOT EXISTS transaction_rollups (
+    gateway VARCHAR(50) NOT NULL COMMENT 'Payment gateway',
+    payment_mode VARCHAR(50) NOT NULL COMMENT 'Payment mode',
+    bucket_hour DATETIME NOT NULL COMMENT 'Start of the hour the transactions were created in',
+    total_transactions INT NOT NULL DEFAULT 0,
+    successful_transactions INT NOT NULL DEFAULT 0,
+    failed_transactions INT NOT NULL DEFAULT 0,
+    pending_transactions INT NOT NULL DEFAULT 0,
+    last_transaction TIMESTAMP NULL COMMENT 'Latest created_at counted in this bucket',
+
+    PRIMARY KEY (gateway, payment_mode, bucket_hour),
+    INDEX idx_bucket_hour (bucket_hour)
+) ENGINE=InnoDB;
+
+-- transactions_archive does not exist yet (003 creates it), so every row is still
+-- in transactions. A NULL created_at is bucketed the way 002 will backfill it.
+-- INSERT IGNORE leaves buckets that already exist untouched, so re-running this
+-- never double counts
+INSERT IGNORE INTO transaction_rollups
+(gateway, payment_mode, bucket_hour, total_transactions, successful_transactions,
+ failed_transactions, pending_transactions, last_transaction)
+SELECT
+    gateway,
+    payment_mode,
+    DATE_FORMAT(COALESCE(created_at, updated_at, CURRENT_TIMESTAMP), '%Y-%m-%d %H:00:00') as bucket_hour,
+    COUNT(*),
+    SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END),
+    SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END),
+    MAX(COALESCE(created_at, updated_at, CURRENT_TIMESTAMP))
+FROM transactions
+GROUP BY gateway, payment_mode, bucket_hour;
+
+ANALYZE TABLE transaction_rollups;
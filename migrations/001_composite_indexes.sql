@@ -0,0 +1,20 @@
+-- Replace single-column indexes with composite indexes matching the queries in main.py
+-- Apply with: python provision_db.py migrations/001_composite_indexes.sql
+
+USE payment_orchestration;
+
+-- idx_transaction_id duplicated the UNIQUE key on transaction_id, idx_gateway is a
+-- prefix of idx_gateway_mode_created, and idx_payment_mode served no query
+ALTER TABLE transactions
+    DROP INDEX idx_transaction_id,
+    DROP INDEX idx_status,
+    DROP INDEX idx_gateway,
+    DROP INDEX idx_payment_mode,
+    ADD INDEX idx_status_created (status, created_at),
+    ADD INDEX idx_created (created_at),
+    ADD INDEX idx_gateway_mode_created (gateway, payment_mode, created_at, status);
+
+ALTER TABLE transaction_rollups
+    ADD INDEX idx_gateway_bucket (gateway, bucket_hour);
+
+ANALYZE TABLE transactions, transaction_rollups;
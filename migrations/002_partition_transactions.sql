@@ -0,0 +1,33 @@
+-- Range partition transactions by created_at
+-- Apply with: python provision_db.py migrations/002_partition_transactions.sql
+-- then run python partitions.py to create the daily or monthly partitions.
+-- Both ALTERs rebuild the table, so run this in a maintenance window.
+
+USE payment_orchestration;
+
+-- Global transaction_id uniqueness moves to the registry, since unique keys of a
+-- partitioned table must include created_at
+CREATE TABLE IF NOT EXISTS transaction_ids (
+    transaction_id VARCHAR(100) NOT NULL PRIMARY KEY COMMENT 'Unique transaction identifier',
+    created_at TIMESTAMP NOT NULL COMMENT 'created_at of the transactions row'
+) ENGINE=InnoDB;
+
+-- The partitioning column can't be NULL
+UPDATE transactions SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+
+INSERT IGNORE INTO transaction_ids (transaction_id, created_at)
+SELECT transaction_id, created_at FROM transactions;
+
+ALTER TABLE transactions
+    MODIFY COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT 'Transaction creation timestamp, the partitioning key',
+    MODIFY COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'Transaction update timestamp',
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, created_at),
+    DROP INDEX transaction_id,
+    ADD UNIQUE KEY uq_transaction_created (transaction_id, created_at);
+
+ALTER TABLE transactions
+PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) (
+    PARTITION p_history VALUES LESS THAN (UNIX_TIMESTAMP('2025-01-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
+);
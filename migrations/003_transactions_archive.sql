@@ -0,0 +1,20 @@
+-- Create the compressed archive table used by archiver.py
+-- Apply with: python provision_db.py migrations/003_transactions_archive.sql
+
+USE payment_orchestration;
+
+CREATE TABLE IF NOT EXISTS transactions_archive (
+    id INT NOT NULL COMMENT 'id the row had in transactions',
+    transaction_id VARCHAR(100) NOT NULL PRIMARY KEY COMMENT 'Unique transaction identifier',
+    gateway VARCHAR(50) NOT NULL,
+    payment_mode VARCHAR(50) NOT NULL,
+    base_amount DECIMAL(10, 2) NOT NULL,
+    fee_amount DECIMAL(10, 2) NOT NULL,
+    total_amount DECIMAL(10, 2) NOT NULL,
+    status VARCHAR(20),
+    gateway_transaction_id VARCHAR(200),
+    gateway_response TEXT,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NULL,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) ENGINE=InnoDB ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8;
@@ -0,0 +1,45 @@
+"""
+Money helpers.
+
+Amounts are carried internally as integer paise. These functions are the only
+place rupee values are converted: request parsing, DB parameters and response
+serialization.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Union
+
+PAISE_PER_RUPEE = 100
+
+# Fee rates are held as integer parts per million of the amount (1% = 10,000)
+PPM_PER_PERCENT = 10_000
+
+
+def to_paise(rupees: Union[Decimal, float, int, str]) -> int:
+    """Convert a rupee amount to integer paise, rounding half up"""
+    if not isinstance(rupees, Decimal):
+        # str() keeps floats like 1500.1 from turning into 1500.0999...
+        rupees = Decimal(str(rupees))
+    return int((rupees * PAISE_PER_RUPEE).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_rupees(paise: int) -> float:
+    """Rupee value of an amount in paise, for JSON responses"""
+    return paise / PAISE_PER_RUPEE
+
+
+def to_decimal(paise: int) -> Decimal:
+    """Exact DECIMAL(10, 2) value of an amount in paise, for DB parameters"""
+    return Decimal(paise).scaleb(-2)
+
+
+def percent_to_ppm(percentage: Union[Decimal, float, int, str]) -> int:
+    """Convert a fee percentage to integer parts per million"""
+    if not isinstance(percentage, Decimal):
+        percentage = Decimal(str(percentage))
+    return int((percentage * PPM_PER_PERCENT).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def apply_ppm(paise: int, ppm: int) -> int:
+    """ppm parts per million of an amount in paise, rounded half up to whole paise"""
+    return (paise * ppm + 500_000) // 1_000_000
@@ -0,0 +1,188 @@
+"""
+Range partition maintenance for the transactions table.
+
+transactions is partitioned by RANGE (UNIX_TIMESTAMP(created_at)) with a
+catch-all p_future partition. maintain() splits p_future into daily or
+monthly partitions ahead of the clock, and removes partitions that fell out
+of the retention window, optionally copying their remaining rows into
+transactions_archive first. archiver.py moves settled rows out well before a
+partition expires, so this usually copies only the few that never settled.
+
+Run it from cron (at least once per period):
+
+    python partitions.py [--granularity month|day] [--premake N] [--retention N]
+                         [--no-archive] [--dry-run]
+
+Functions take any DB-API cursor returning tuples, so provision_db.py can run
+them on its mysql.connector connection right after creating the schema.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from archiver import ARCHIVE_COLUMNS
+
+PARTITION_CONFIG = {
+    'table': 'transactions',
+    'granularity': 'month',   # 'month' or 'day'
+    'premake': 3,             # Periods to keep created ahead of the current one
+    'retention': 13,          # Periods kept before the current one
+    'archive': True,          # Copy rows of expired partitions into transactions_archive before dropping them
+}
+
+FUTURE_PARTITION = 'p_future'
+
+PARTITIONS_SQL = """
+    SELECT
+        PARTITION_NAME,
+        IF(PARTITION_DESCRIPTION = 'MAXVALUE', NULL, FROM_UNIXTIME(PARTITION_DESCRIPTION)),
+        TABLE_ROWS
+    FROM information_schema.PARTITIONS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+    ORDER BY PARTITION_ORDINAL_POSITION
+"""
+
+
+def period_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the day or month containing moment"""
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'month':
+        start = start.replace(day=1)
+    return start
+
+
+def shift(start: datetime, granularity: str, periods: int) -> datetime:
+    """Period start the given number of periods after (or before) start"""
+    if granularity == 'day':
+        return start + timedelta(days=periods)
+    month = start.month - 1 + periods
+    return start.replace(year=start.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(start: datetime, granularity: str) -> str:
+    """Name of the partition holding the period beginning at start"""
+    return 'p' + start.strftime('%Y%m' if granularity == 'month' else '%Y%m%d')
+
+
+def range_name(lower: datetime, upper: datetime, granularity: str) -> str:
+    """Name of the partition holding [lower, upper): the period's name, or a catch-up name for any other range"""
+    if lower == period_start(lower, granularity) and upper == shift(lower, granularity, 1):
+        return partition_name(lower, granularity)
+    return f"p_catchup_{lower:%Y%m%d}_{upper:%Y%m%d}"
+
+
+def list_partitions(cursor, table: str) -> list[tuple[str, datetime, int]]:
+    """(name, upper bound or None for MAXVALUE, approximate rows) in partition order"""
+    cursor.execute(PARTITIONS_SQL, (table,))
+    return [tuple(row) for row in cursor.fetchall()]
+
+
+def future_bounds(last_bound: datetime, now: datetime, granularity: str, premake: int, retention: int) -> list[datetime]:
+    """
+    Upper bounds of the partitions to create after last_bound.
+
+    Each bound is one period after the previous one, except that the first
+    may cover a longer or unaligned range: after a long gap, one catch-up
+    partition runs from last_bound to the retention floor instead of one
+    partition per period that would expire immediately.
+    """
+    current = period_start(now, granularity)
+    horizon = shift(current, granularity, premake + 1)
+    floor = shift(current, granularity, -retention)
+    bound = max(shift(period_start(last_bound, granularity), granularity, 1), floor)
+
+    bounds = []
+    while bound <= horizon:
+        if bound > last_bound:
+            bounds.append(bound)
+        bound = shift(bound, granularity, 1)
+    return bounds
+
+
+def create_statements(table: str, partitions, now: datetime, granularity: str, premake: int, retention: int) -> list[str]:
+    """REORGANIZE p_future into new partitions covering the next premake periods"""
+    finite = [bound for _, bound, _ in partitions if bound is not None]
+    if not finite:
+        raise ValueError(f"{table} has no bounded partition to extend from")
+
+    bounds = future_bounds(max(finite), now, granularity, premake, retention)
+    if not bounds:
+        return []
+
+    definitions = [
+        f"PARTITION {range_name(lower, bound, granularity)} "
+        f"VALUES LESS THAN (UNIX_TIMESTAMP('{bound:%Y-%m-%d %H:%M:%S}'))"
+        for lower, bound in zip([max(finite)] + bounds, bounds)
+    ]
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+    # REORGANIZE copies p_future's rows. Running ahead of the clock keeps it empty, so
+    # this is cheap, except on the first run after migrations/002 when p_future still
+    # holds every row newer than p_history: run that one in a maintenance window
+    return [
+        f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO (\n    "
+        + ",\n    ".join(definitions) + "\n)"
+    ]
+
+
+def expire_statements(table: str, partitions, now: datetime, granularity: str, retention: int, archive: bool) -> list[str]:
+    """Archive (optionally) and drop partitions whose rows are all older than the retention window"""
+    cutoff = shift(period_start(now, granularity), granularity, -retention)
+    statements = []
+
+    for name, bound, _ in partitions:
+        if bound is None or bound > cutoff:
+            continue
+        if archive:
+            statements.append(
+                f"INSERT IGNORE INTO {table}_archive ({ARCHIVE_COLUMNS.strip()})\n"
+                f"SELECT {ARCHIVE_COLUMNS.strip()} FROM {table} PARTITION ({name})"
+            )
+        statements.append(f"ALTER TABLE {table} DROP PARTITION {name}")
+
+    return statements
+
+
+def maintain(cursor, now: datetime = None, table: str = PARTITION_CONFIG['table'],
+             granularity: str = PARTITION_CONFIG['granularity'], premake: int = PARTITION_CONFIG['premake'],
+             retention: int = PARTITION_CONFIG['retention'], archive: bool = PARTITION_CONFIG['archive'],
+             dry_run: bool = False) -> list[str]:
+    """Create future partitions and expire old ones; returns the statements run"""
+    if granularity not in ('day', 'month'):
+        raise ValueError(f"Unknown partition granularity: {granularity}")
+
+    partitions = list_partitions(cursor, table)
+    if not partitions:
+        print(f"{table} is not partitioned, skipping partition maintenance")
+        return []
+
+    now = now or datetime.now()
+    statements = (create_statements(table, partitions, now, granularity, premake, retention)
+                  + expire_statements(table, partitions, now, granularity, retention, archive))
+
+    for statement in statements:
+        print(statement)
+        if not dry_run:
+            cursor.execute(statement)
+    return statements
+
+
+if __name__ == "__main__":
+    import pymysql
+    from main import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="Create future and expire old transactions partitions")
+    parser.add_argument("--granularity", choices=["day", "month"], default=PARTITION_CONFIG['granularity'])
+    parser.add_argument("--premake", type=int, default=PARTITION_CONFIG['premake'])
+    parser.add_argument("--retention", type=int, default=PARTITION_CONFIG['retention'])
+    parser.add_argument("--no-archive", dest="archive", action="store_false", default=PARTITION_CONFIG['archive'])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    connection = pymysql.connect(autocommit=True, **DB_CONFIG)
+    try:
+        with connection.cursor() as cursor:
+            statements = maintain(cursor, granularity=args.granularity, premake=args.premake,
+                                  retention=args.retention, archive=args.archive, dry_run=args.dry_run)
+        print(f"Partition maintenance {'planned' if args.dry_run else 'applied'}: {len(statements)} statements")
+    finally:
+        connection.close()
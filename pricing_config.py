@@ -0,0 +1,181 @@
+"""
+Externally configured pricing: the checkout gateway catalog and fee schedules.
+
+The config file is compiled into an immutable PricingConfig and published by
+replacing a single reference, so request handlers read pricing.current once
+per request without taking a lock and always see a consistent snapshot.
+
+File layout:
+
+    {
+        "version": 1,
+        "default_payment_mode": "upi",
+        "fee_schedules": {"<payment_mode>": [<tier>, ...], ...},
+        "gateways": [
+            {
+                "gateway": "<name>",
+                "payment_modes": ["<payment_mode>", ...],
+                "fee_schedules": {"<payment_mode>": [<tier>, ...]}
+            }
+        ]
+    }
+
+Top-level fee_schedules apply to every gateway; a gateway's own
+fee_schedules override them for that gateway. Tiers use the fee_engine
+format ("up_to", "percentage", "flat", "min_fee", "max_fee").
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from fee_engine import DEFAULT_FEE_SCHEDULES, DEFAULT_PAYMENT_MODE, FeeEngine
+
+# Gateways and payment modes offered at checkout when no config file is present
+DEFAULT_PAYMENT_METHODS = [
+    ("Razorpay", "debit_card"),
+    ("Razorpay", "credit_card"),
+    ("Razorpay", "netbanking"),
+    ("Razorpay", "upi"),
+    ("PayU", "debit_card"),
+    ("PayU", "credit_card"),
+    ("PayU", "upi"),
+    ("Cashfree", "debit_card"),
+    ("Cashfree", "upi"),
+]
+
+
+class PricingConfig:
+    """One compiled, immutable version of the pricing config"""
+
+    __slots__ = ("version", "checksum", "payment_methods", "fee_engine", "loaded_at")
+
+    def __init__(self, version, checksum: str, payment_methods, fee_engine: FeeEngine):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "checksum", checksum)
+        object.__setattr__(self, "payment_methods", tuple(payment_methods))
+        object.__setattr__(self, "fee_engine", fee_engine)
+        object.__setattr__(self, "loaded_at", time.time())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PricingConfig is immutable")
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "checksum": self.checksum,
+            "loaded_at": self.loaded_at,
+            "payment_methods": [
+                {"gateway": gateway, "payment_mode": payment_mode}
+                for gateway, payment_mode in self.payment_methods
+            ],
+        }
+
+
+def default_pricing_config() -> PricingConfig:
+    """Built-in pricing used when the config file is missing"""
+    return PricingConfig("builtin", None, DEFAULT_PAYMENT_METHODS, FeeEngine(DEFAULT_FEE_SCHEDULES))
+
+
+def compile_pricing_config(raw: bytes) -> PricingConfig:
+    """Parse and validate a config document; raises ValueError if it is invalid"""
+    try:
+        document = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid pricing config JSON: {e}")
+
+    if "version" not in document:
+        raise ValueError("Pricing config is missing 'version'")
+
+    payment_methods = []
+    gateway_schedules = {}
+    for entry in document.get("gateways", []):
+        for payment_mode in entry["payment_modes"]:
+            payment_methods.append((entry["gateway"], payment_mode))
+        if entry.get("fee_schedules"):
+            gateway_schedules[entry["gateway"]] = entry["fee_schedules"]
+    if not payment_methods:
+        raise ValueError("Pricing config defines no gateways")
+
+    fee_engine = FeeEngine(
+        document.get("fee_schedules", {}),
+        gateway_schedules,
+        document.get("default_payment_mode", DEFAULT_PAYMENT_MODE)
+    )
+
+    return PricingConfig(document["version"], hashlib.sha256(raw).hexdigest(), payment_methods, fee_engine)
+
+
+class PricingConfigStore:
+    """Holds the current PricingConfig and hot-swaps it when the file changes"""
+
+    def __init__(self, path: str, poll_interval: float = 5):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.current = default_pricing_config()
+        self.last_error = None
+
+        self._reload_lock = threading.Lock()
+        self._mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def reload(self) -> bool:
+        """Load the config file and swap it in if its content changed; returns True on swap"""
+        with self._reload_lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with open(self.path, "rb") as file:
+                    raw = file.read()
+            except FileNotFoundError:
+                self.last_error = f"Pricing config {self.path} not found; using {self.current.version} pricing"
+                return False
+
+            self._mtime = mtime
+            if hashlib.sha256(raw).hexdigest() == self.current.checksum:
+                return False
+
+            try:
+                config = compile_pricing_config(raw)
+            except (ValueError, KeyError, TypeError) as e:
+                # Keep serving the previous version rather than a half-valid one
+                self.last_error = f"Rejected pricing config: {e}"
+                print(self.last_error)
+                return False
+
+            # A single reference assignment publishes the new version atomically
+            self.current = config
+            self.last_error = None
+            print(f"Loaded pricing config version {config.version}")
+            return True
+
+    def _changed_on_disk(self) -> bool:
+        try:
+            return os.stat(self.path).st_mtime_ns != self._mtime
+        except FileNotFoundError:
+            return False
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            if self._changed_on_disk():
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"Error reloading pricing config: {e}")
+
+    def start(self):
+        """Load the config and start watching it for changes"""
+        self.reload()
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="pricing-config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout=self.poll_interval)
@@ -0,0 +1,131 @@
+"""
+Sampling profiler for a live worker process.
+
+A background thread snapshots every other thread's Python stack with
+sys._current_frames() each interval and counts identical stacks. The
+result is in the collapsed format that flamegraph.pl and speedscope read:
+one "root;...;leaf count" line per distinct stack. Sampled threads are
+never paused, so the overhead is the sampler's own share of the GIL: a few
+microseconds per thread per sample.
+
+The sampler can only look while it holds the GIL. With the default 5ms
+switch interval it would mostly get the GIL when the event loop releases it
+in select(), so handler code that runs for under 5ms between awaits would
+never be seen. While a profile runs, the switch interval is lowered to
+SAMPLING_SWITCH_INTERVAL so the sampler interrupts running code promptly.
+
+Passing a code object restricts the profile to stacks that contain it.
+Handlers are filtered by their endpoint function's code, so only time
+spent running that route's handler (and what it calls on the same thread)
+is counted. Time spent awaiting, or in work the handler hands to the
+threadpool, is not on the handler's stack.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# GIL switch interval (seconds) in effect while sampling
+SAMPLING_SWITCH_INTERVAL = 0.0001
+
+# Leaf frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+}
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile is requested while another one is running"""
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Collects collapsed stacks of the whole process, one profile at a time"""
+
+    def __init__(self, max_stack_depth: int = 128):
+        self.max_stack_depth = max_stack_depth
+        self._running = threading.Lock()
+        self._labels = {}
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = frame_label(code)
+        return label
+
+    def _stack(self, frame, match) -> Optional[tuple]:
+        """Code objects from root to leaf, or None if match is given and not among them"""
+        codes = []
+        while frame is not None and len(codes) < self.max_stack_depth:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        if match is not None and match not in codes:
+            return None
+        codes.reverse()
+        return tuple(codes)
+
+    def profile(self, seconds: float, interval: float = 0.01, match=None, include_idle: bool = False) -> dict:
+        """Sample for seconds; returns collapsed stacks and sample counts"""
+        if not self._running.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running")
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, SAMPLING_SWITCH_INTERVAL))
+        try:
+            own_thread = threading.get_ident()
+            stacks = Counter()
+            samples = 0
+            matched = 0
+            started = time.perf_counter()
+            deadline = started + seconds
+            next_sample = started
+
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                if next_sample > now:
+                    time.sleep(next_sample - now)
+                else:
+                    # Fell behind; skip the missed samples rather than bursting to catch up
+                    next_sample = now
+                next_sample += interval
+
+                frames = sys._current_frames()
+                samples += 1
+                for thread_id, frame in frames.items():
+                    if thread_id == own_thread:
+                        continue
+                    stack = self._stack(frame, match)
+                    if stack is None:
+                        continue
+                    leaf = stack[-1]
+                    if not include_idle and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                        continue
+                    matched += 1
+                    stacks[(thread_id, stack)] += 1
+                del frames
+
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            collapsed = Counter()
+            for (thread_id, stack), count in stacks.items():
+                root = names.get(thread_id, f"thread-{thread_id}").replace(";", ":")
+                collapsed[";".join([root] + [self._label(code).replace(";", ":") for code in stack])] += count
+
+            return {
+                "samples": samples,
+                "matched": matched,
+                "elapsed": round(time.perf_counter() - started, 3),
+                "collapsed": "".join(f"{stack} {count}\n" for stack, count in collapsed.most_common()),
+            }
+        finally:
+            sys.setswitchinterval(switch_interval)
+            self._running.release()
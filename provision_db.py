@@ -1,6 +1,10 @@
+import sys
+
 import mysql.connector
 from mysql.connector import Error
 
+import partitions
+
 def execute_sql_script(sql_file_path, host='localhost', user='root', password=''):
     """
     Executes all SQL statements in the given .sql file.
@@ -28,9 +32,18 @@ def execute_sql_script(sql_file_path, host='localhost', user='root', password=''
             for command in commands:
                 try:
                     cursor.execute(command)
+                    # Statements like ANALYZE TABLE return rows that must be consumed
+                    if cursor.with_rows:
+                        cursor.fetchall()
                 except Error as e:
                     print(f"Skipping failed command:\n{command}\nError: {e}")
 
+            # Split p_future into dated partitions right away rather than waiting for cron
+            try:
+                partitions.maintain(cursor)
+            except (Error, ValueError) as e:
+                print(f"Error creating transactions partitions: {e}")
+
             print("🎉 Database schema successfully provisioned!")
 
     except Error as e:
@@ -44,8 +57,8 @@ def execute_sql_script(sql_file_path, host='localhost', user='root', password=''
 
 
 if __name__ == "__main__":
-    # Change these if needed
-    SQL_FILE = "database_schema.sql"
+    # Change these if needed; pass a migration file to apply it instead of the full schema
+    SQL_FILE = sys.argv[1] if len(sys.argv) > 1 else "database_schema.sql"
     HOST = "localhost"
     USER = "root"
     PASSWORD = "root"  # Set your MySQL password if required
@@ -0,0 +1,190 @@
+"""
+Per-fingerprint statement statistics and a slow query log.
+
+The instrumented cursors (db_pool.ObservedCursor, async_db.AsyncObservedCursor)
+report every statement to QueryStats.record(). Statements are grouped by
+fingerprint: the SQL with comments stripped, literals and placeholders
+replaced by ?, value and IN lists collapsed to (...), and whitespace
+normalized. Statements built for batches of different sizes therefore
+share a row. The table is bounded; when it is full, the fingerprint with
+the least total time is evicted.
+
+Statements slower than slow_threshold_ms are printed and kept in a short
+ring buffer, with parameters redacted to their types so no payment data
+reaches the log.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+
+from metrics import current_route
+
+_COMMENTS = re.compile(r"/\*.*?\*/|--[^\n]*|#[^\n]*", re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_NESTED_LISTS = re.compile(r"\(\s*\(\.\.\.\)\s*\)")
+_REPEATED_CASES = re.compile(r"(?:WHEN \? THEN \? )+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Distinct query strings whose fingerprint is memoized
+FINGERPRINT_CACHE_SIZE = 2000
+
+ORDER_KEYS = ("total_ms", "count", "max_ms", "mean_ms", "rows")
+
+
+def fingerprint(query: str) -> str:
+    """Normalized statement text shared by executions that differ only in values or list lengths"""
+    text = _STRINGS.sub("?", query)
+    text = _COMMENTS.sub(" ", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    text = _REPEATED_CASES.sub("WHEN ? THEN ? ", text)
+    text = _LISTS.sub("(...)", text)
+    text = _REPEATED_LISTS.sub("(...)", text)
+    text = _NESTED_LISTS.sub("(...)", text)
+    return text
+
+
+def redact(args) -> object:
+    """Parameters with every value replaced by its type, so a slow query can be logged safely"""
+    if args is None:
+        return None
+    if isinstance(args, dict):
+        return {key: redact(value) for key, value in args.items()}
+    if isinstance(args, (list, tuple)):
+        if args and all(isinstance(row, (list, tuple, dict)) for row in args):
+            # executemany: one parameter set per row
+            return f"<{len(args)} rows of {redact(args[0])}>"
+        return [redact(value) for value in args]
+    if isinstance(args, str):
+        return f"<str:{len(args)}>"
+    return f"<{type(args).__name__}>"
+
+
+class _Entry:
+    __slots__ = ("count", "total", "max", "rows", "last_seen")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.last_seen = None
+
+
+class QueryStats:
+    """Bounded per-fingerprint counters plus the most recent slow statements"""
+
+    def __init__(self, enabled: bool = True, max_fingerprints: int = 500, slow_threshold_ms: float = 200,
+                 slow_log_size: int = 100):
+        self.enabled = enabled
+        self.max_fingerprints = max_fingerprints
+        self.slow_threshold = slow_threshold_ms / 1000
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._fingerprints = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._evictions = 0
+        self._since = time.time()
+
+    def _fingerprint(self, query: str) -> str:
+        cached = self._fingerprints.get(query)
+        if cached is None:
+            cached = fingerprint(query)
+            if len(self._fingerprints) >= FINGERPRINT_CACHE_SIZE:
+                self._fingerprints.clear()
+            self._fingerprints[query] = cached
+        return cached
+
+    def record(self, query, args, seconds: float, cursor):
+        """Account one statement; cursor is the driver cursor it ran on"""
+        if not self.enabled:
+            return
+        if isinstance(query, bytes):
+            query = query.decode("utf-8", "replace")
+
+        # Rows returned by a SELECT on a buffered cursor, rows affected otherwise
+        rows = getattr(cursor, "rowcount", None)
+        if rows is None or rows < 0 or rows >= 2 ** 63:
+            rows = 0
+
+        with self._lock:
+            key = self._fingerprint(query)
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    del self._entries[min(self._entries, key=lambda k: self._entries[k].total)]
+                    self._evictions += 1
+                entry = self._entries[key] = _Entry()
+            entry.count += 1
+            entry.total += seconds
+            entry.max = max(entry.max, seconds)
+            entry.rows += rows
+            entry.last_seen = time.time()
+
+        if seconds >= self.slow_threshold:
+            slow = {
+                "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "ms": round(seconds * 1000, 3),
+                "route": current_route(),
+                "rows": rows,
+                "fingerprint": key,
+                "params": redact(args),
+            }
+            with self._lock:
+                self._slow.append(slow)
+            print(f"Slow query ({slow['ms']}ms, {rows} rows, {slow['route']}): {key} params={slow['params']}")
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> list[dict]:
+        """The limit heaviest fingerprints by order_by, one of ORDER_KEYS"""
+        if order_by not in ORDER_KEYS:
+            raise ValueError(f"order_by must be one of {', '.join(ORDER_KEYS)}")
+        with self._lock:
+            rows = [
+                {
+                    "fingerprint": key,
+                    "count": entry.count,
+                    "total_ms": round(entry.total * 1000, 3),
+                    "mean_ms": round(entry.total / entry.count * 1000, 3),
+                    "max_ms": round(entry.max * 1000, 3),
+                    "rows": entry.rows,
+                    "rows_per_call": round(entry.rows / entry.count, 2),
+                    "last_seen": entry.last_seen,
+                }
+                for key, entry in self._entries.items()
+            ]
+        rows.sort(key=lambda row: row[order_by], reverse=True)
+        return rows[:limit]
+
+    def slow_queries(self) -> list[dict]:
+        """Most recent slow statements, newest first"""
+        with self._lock:
+            slow = list(self._slow)
+        slow.reverse()
+        return slow
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self._slow.clear()
+            self._evictions = 0
+            self._since = time.time()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "since": self._since,
+                "fingerprints": len(self._entries),
+                "max_fingerprints": self.max_fingerprints,
+                "evictions": self._evictions,
+                "slow_threshold_ms": self.slow_threshold * 1000,
+                "slow_logged": len(self._slow),
+            }
@@ -0,0 +1,150 @@
+"""
+Hourly success-rate counters maintained alongside the transactions table.
+
+Every insert and status change adjusts the (gateway, payment_mode, hour)
+bucket the transaction was created in, inside the caller's database
+transaction, so success-rate reads sum a handful of buckets instead of
+rescanning every transaction in the window.
+"""
+
+from datetime import datetime, timedelta
+
+# Statuses with their own counter column (index into a bucket's counters);
+# anything else only counts towards the total
+STATUS_SLOTS = {
+    'success': 1,
+    'failed': 2,
+    'pending': 3,
+}
+
+UPSERT_BUCKET_SQL = """
+    INSERT INTO transaction_rollups
+    (gateway, payment_mode, bucket_hour, total_transactions, successful_transactions,
+     failed_transactions, pending_transactions, last_transaction)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_transactions = total_transactions + VALUES(total_transactions),
+        successful_transactions = successful_transactions + VALUES(successful_transactions),
+        failed_transactions = failed_transactions + VALUES(failed_transactions),
+        pending_transactions = pending_transactions + VALUES(pending_transactions),
+        last_transaction = COALESCE(GREATEST(last_transaction, VALUES(last_transaction)),
+                                    last_transaction, VALUES(last_transaction))
+"""
+
+REBUILD_SQL = """
+    INSERT INTO transaction_rollups
+    (gateway, payment_mode, bucket_hour, total_transactions, successful_transactions,
+     failed_transactions, pending_transactions, last_transaction)
+    SELECT
+        gateway,
+        payment_mode,
+        DATE_FORMAT(created_at, '%Y-%m-%d %H:00:00') as bucket_hour,
+        COUNT(*),
+        SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN status = 'failed' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END),
+        MAX(created_at)
+    FROM (
+        SELECT gateway, payment_mode, status, created_at FROM transactions
+        UNION ALL
+        SELECT gateway, payment_mode, status, created_at FROM transactions_archive
+    ) AS counted
+    GROUP BY gateway, payment_mode, bucket_hour
+"""
+
+
+def bucket_for(created_at: datetime) -> datetime:
+    """Hour bucket a transaction created at created_at belongs to"""
+    return created_at.replace(minute=0, second=0, microsecond=0)
+
+
+def window_start(days: int, now: datetime = None) -> datetime:
+    """First bucket included in a window covering the last N days"""
+    return bucket_for((now or datetime.now()) - timedelta(days=days))
+
+
+class RollupDeltas:
+    """Accumulates counter changes per bucket so they can be applied in one statement"""
+
+    def __init__(self):
+        self._buckets = {}
+
+    def _bucket(self, gateway: str, payment_mode: str, created_at: datetime) -> list:
+        key = (gateway, payment_mode, bucket_for(created_at))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # total, success, failed, pending, last_transaction
+            bucket = self._buckets[key] = [0, 0, 0, 0, None]
+        return bucket
+
+    def _adjust_status(self, bucket: list, status: str, delta: int):
+        slot = STATUS_SLOTS.get(status)
+        if slot is not None:
+            bucket[slot] += delta
+
+    def insert(self, gateway: str, payment_mode: str, status: str, created_at: datetime):
+        """Record a newly inserted transaction"""
+        bucket = self._bucket(gateway, payment_mode, created_at)
+        bucket[0] += 1
+        self._adjust_status(bucket, status, 1)
+        if bucket[4] is None or created_at > bucket[4]:
+            bucket[4] = created_at
+
+    def delete(self, gateway: str, payment_mode: str, status: str, created_at: datetime):
+        """Record a transaction removed without being archived; last_transaction is left as is"""
+        bucket = self._bucket(gateway, payment_mode, created_at)
+        bucket[0] -= 1
+        self._adjust_status(bucket, status, -1)
+
+    def status_change(self, gateway: str, payment_mode: str, created_at: datetime,
+                      old_status: str, new_status: str):
+        """Record a transaction moving from old_status to new_status"""
+        if old_status == new_status:
+            return
+        bucket = self._bucket(gateway, payment_mode, created_at)
+        self._adjust_status(bucket, old_status, -1)
+        self._adjust_status(bucket, new_status, 1)
+
+    def drain(self) -> list[tuple]:
+        """UPSERT_BUCKET_SQL parameters for the accumulated deltas, in bucket order; clears them"""
+        # A fixed order makes concurrent writers lock shared buckets in the same sequence
+        rows = [
+            (gateway, payment_mode, bucket_hour, total, success, failed, pending, last_transaction)
+            for (gateway, payment_mode, bucket_hour), (total, success, failed, pending, last_transaction)
+            in sorted(self._buckets.items())
+            if total or success or failed or pending
+        ]
+        self._buckets.clear()
+        return rows
+
+    async def apply(self, cursor):
+        """Write the accumulated deltas using the caller's async cursor (and transaction)"""
+        rows = self.drain()
+        if rows:
+            await cursor.executemany(UPSERT_BUCKET_SQL, rows)
+
+
+def rebuild(cursor):
+    """
+    Recompute every bucket from transactions and transactions_archive.
+
+    Rows in dropped partitions are in neither table, so their counts are lost;
+    and deltas committed by other writers while this runs can be lost too.
+    Only use it as a repair with writers stopped, never routinely.
+    """
+    cursor.execute("DELETE FROM transaction_rollups")
+    cursor.execute(REBUILD_SQL)
+
+
+if __name__ == "__main__":
+    import pymysql
+    from main import DB_CONFIG
+
+    connection = pymysql.connect(**DB_CONFIG)
+    try:
+        with connection.cursor() as cursor:
+            rebuild(cursor)
+        connection.commit()
+        print("Transaction rollups rebuilt")
+    finally:
+        connection.close()
@@ -0,0 +1,81 @@
+"""
+In-process pub/sub of transaction status changes, keyed by transaction_id.
+
+Long-poll and SSE handlers subscribe before reading the current status (so a
+change in between is not missed) and park on their queue until a writer in
+this process publishes. Changes made through another worker are not
+delivered here; subscribers pick those up when they recheck the database
+after their timeout or resync interval.
+
+All methods must be called from the event loop thread.
+"""
+
+import asyncio
+from contextlib import contextmanager
+
+
+class SubscriberLimitError(Exception):
+    """Raised when max_subscribers requests are already waiting"""
+
+
+class StatusEvents:
+    """Fan-out of status changes to the requests waiting on each transaction"""
+
+    def __init__(self, max_subscribers: int = 10000, queue_size: int = 16):
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+
+        # transaction_id -> set of subscriber queues
+        self._subscribers = {}
+        self._count = 0
+
+        self._published = 0
+        self._delivered = 0
+        self._dropped = 0
+        self._rejected = 0
+
+    @contextmanager
+    def subscription(self, transaction_id: str):
+        """Queue receiving every status published for transaction_id while the block runs"""
+        if self._count >= self.max_subscribers:
+            self._rejected += 1
+            raise SubscriberLimitError(f"Too many status subscribers ({self.max_subscribers})")
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(transaction_id, set()).add(queue)
+        self._count += 1
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(transaction_id)
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[transaction_id]
+            self._count -= 1
+
+    def publish(self, transaction_id: str, status: str) -> int:
+        """Deliver a status change to every subscriber of transaction_id; returns how many got it"""
+        self._published += 1
+        queues = self._subscribers.get(transaction_id)
+        if not queues:
+            return 0
+
+        for queue in queues:
+            if queue.full():
+                # A slow reader only needs the latest status
+                queue.get_nowait()
+                self._dropped += 1
+            queue.put_nowait(status)
+        self._delivered += len(queues)
+        return len(queues)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": self._count,
+            "transactions": len(self._subscribers),
+            "max_subscribers": self.max_subscribers,
+            "published": self._published,
+            "delivered": self._delivered,
+            "dropped": self._dropped,
+            "rejected": self._rejected,
+        }
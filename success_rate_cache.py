@@ -0,0 +1,196 @@
+"""
+Process-local cache of (gateway, payment_mode) success rates with background refresh
+"""
+
+import threading
+import time
+from typing import Callable, Iterable
+
+
+class SuccessRateCache:
+    """
+    Success rates keyed by (gateway, payment_mode, window_days).
+
+    Reads never touch the database: fresh entries are served as hits, entries
+    older than ttl are served stale (up to stale_ttl) while a background thread
+    reloads them, and unknown keys return the default rate until the refresher
+    has loaded them. The loader receives a list of (gateway, payment_mode)
+    pairs and a window in days and must return a mapping of pair -> rate,
+    raising on failure so that stale values are kept rather than overwritten.
+    After a failed load the refresher backs off, from refresh_interval
+    doubling up to max_backoff, and ignores wake-ups from readers meanwhile,
+    so an unreachable database is not retried at the request rate.
+    """
+
+    def __init__(self, loader: Callable[[list, int], dict], default_rate: float,
+                 ttl: float = 60, stale_ttl: float = 600, refresh_interval: float = 10,
+                 max_idle: float = 3600, max_backoff: float = 300):
+        self.loader = loader
+        self.default_rate = default_rate
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_interval = refresh_interval
+        self.max_idle = max_idle
+        self.max_backoff = max_backoff
+
+        self._lock = threading.Lock()
+        # (gateway, payment_mode, days) -> [rate, loaded_at, last_access]
+        self._entries = {}
+        self._pending = set()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._refresh_errors = 0
+        self._consecutive_errors = 0
+        self._last_refresh_ms = None
+        self._last_refresh_at = None
+
+    def get_many(self, pairs: Iterable[tuple[str, str]], days: int) -> dict[tuple[str, str], float]:
+        """Return a rate for every pair without blocking on the database"""
+        now = time.monotonic()
+        rates = {}
+        schedule = False
+
+        with self._lock:
+            for gateway, payment_mode in pairs:
+                key = (gateway, payment_mode, days)
+                entry = self._entries.get(key)
+
+                if entry is None:
+                    self._misses += 1
+                    rates[(gateway, payment_mode)] = self.default_rate
+                    self._pending.add(key)
+                    schedule = True
+                    continue
+
+                entry[2] = now
+                age = now - entry[1]
+                if age <= self.ttl:
+                    self._hits += 1
+                elif age <= self.stale_ttl:
+                    self._stale_hits += 1
+                    self._pending.add(key)
+                    schedule = True
+                else:
+                    # Too old to trust, but still better than the default while the refresh runs
+                    self._misses += 1
+                    self._pending.add(key)
+                    schedule = True
+                rates[(gateway, payment_mode)] = entry[0]
+
+        if schedule:
+            self._wake.set()
+        return rates
+
+    def load(self, pairs: Iterable[tuple[str, str]], days: int):
+        """Synchronously load pairs into the cache (used to warm it at startup)"""
+        self._refresh({(gateway, payment_mode, days) for gateway, payment_mode in pairs})
+
+    def _refresh(self, keys: set) -> bool:
+        """Load keys grouped by window; returns False if any load failed"""
+        succeeded = True
+        by_window = {}
+        for gateway, payment_mode, days in keys:
+            by_window.setdefault(days, []).append((gateway, payment_mode))
+
+        for days, pairs in by_window.items():
+            started = time.monotonic()
+            try:
+                rates = self.loader(pairs, days)
+            except Exception as e:
+                print(f"Error refreshing success rates: {e}")
+                succeeded = False
+                with self._lock:
+                    self._refresh_errors += 1
+                    # Retry on the next cycle
+                    self._pending.update((gateway, payment_mode, days) for gateway, payment_mode in pairs)
+                continue
+
+            finished = time.monotonic()
+            with self._lock:
+                for gateway, payment_mode in pairs:
+                    key = (gateway, payment_mode, days)
+                    rate = rates.get((gateway, payment_mode), self.default_rate)
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        self._entries[key] = [rate, finished, finished]
+                    else:
+                        entry[0] = rate
+                        entry[1] = finished
+                self._refreshes += 1
+                self._last_refresh_ms = round((finished - started) * 1000, 3)
+                self._last_refresh_at = time.time()
+        return succeeded
+
+    def _collect_due(self) -> set:
+        """Keys explicitly requested plus entries about to expire; idle entries are dropped"""
+        now = time.monotonic()
+        with self._lock:
+            due = self._pending
+            self._pending = set()
+            for key, (_, loaded_at, last_access) in list(self._entries.items()):
+                if now - last_access > self.max_idle:
+                    del self._entries[key]
+                    due.discard(key)
+                elif now - loaded_at >= self.ttl - self.refresh_interval:
+                    due.add(key)
+        return due
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            due = self._collect_due()
+            if not due:
+                continue
+            if self._refresh(due):
+                self._consecutive_errors = 0
+                continue
+            self._consecutive_errors += 1
+            backoff = min(self.refresh_interval * 2 ** (self._consecutive_errors - 1), self.max_backoff)
+            # Wake-ups from readers during the backoff are dropped, the keys stay pending
+            self._stop.wait(backoff)
+            self._wake.clear()
+
+    def start(self):
+        """Start the background refresher thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="success-rate-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresher thread"""
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        self._wake.set()
+        if thread is not None:
+            thread.join(timeout=self.refresh_interval)
+
+    def stats(self) -> dict:
+        """Hit/miss/refresh counters"""
+        with self._lock:
+            lookups = self._hits + self._stale_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "pending_refresh": len(self._pending),
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "hit_ratio": round((self._hits + self._stale_hits) / lookups, 4) if lookups else None,
+                "refreshes": self._refreshes,
+                "refresh_errors": self._refresh_errors,
+                "consecutive_refresh_errors": self._consecutive_errors,
+                "last_refresh_ms": self._last_refresh_ms,
+                "last_refresh_at": self._last_refresh_at,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+            }
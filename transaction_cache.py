@@ -0,0 +1,122 @@
+"""
+Process-local read-through LRU cache for get_transaction.
+
+Writers populate (create) or invalidate (update) an entry after their commit.
+Every write takes the next sequence number, which is returned to the writing
+client as a version token ("<process id>.<sequence>"). A reader presenting
+its token is served from the cache only if this process made that write and
+the entry is at least that new; otherwise the read goes to the database.
+That gives the writing client read-your-writes even when its next request
+lands on another worker, whose cache never saw the write.
+
+Readers call begin_read() before querying and pass the result to
+put_if_unchanged(), so a row read before a concurrent invalidation is never
+cached over it.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+
+class TransactionCache:
+    """Bounded LRU of transaction rows keyed by transaction_id, with a TTL"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 2.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.process_id = uuid.uuid4().hex[:12]
+
+        self._lock = threading.Lock()
+        # transaction_id -> (row or None for a tombstone, sequence, expires_at)
+        self._entries = OrderedDict()
+        self._sequence = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._bypasses = 0
+        self._stale_puts = 0
+        self._invalidations = 0
+        self._evictions = 0
+
+    def _store(self, transaction_id: str, row: Optional[dict], sequence: int):
+        self._entries[transaction_id] = (row, sequence, time.monotonic() + self.ttl)
+        self._entries.move_to_end(transaction_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _parse_version(self, version: Optional[str]) -> Optional[int]:
+        """Sequence of a version token issued by this process, 0 for none, None for another process's"""
+        if not version:
+            return 0
+        process_id, _, sequence = version.partition(".")
+        if process_id != self.process_id or not sequence.isdigit():
+            return None
+        return int(sequence)
+
+    def get(self, transaction_id: str, version: Optional[str] = None) -> Optional[dict]:
+        """Cached row, or None if the caller must read the database"""
+        with self._lock:
+            min_sequence = self._parse_version(version)
+            if min_sequence is None:
+                # Written through another worker: only the database is guaranteed to have it
+                self._bypasses += 1
+                return None
+
+            entry = self._entries.get(transaction_id)
+            if entry is None or entry[0] is None or entry[2] < time.monotonic() or entry[1] < min_sequence:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(transaction_id)
+            self._hits += 1
+            return entry[0]
+
+    def begin_read(self) -> int:
+        """Sequence to pass to put_if_unchanged after reading from the database"""
+        with self._lock:
+            return self._sequence
+
+    def put_if_unchanged(self, transaction_id: str, row: dict, read_sequence: int):
+        """Cache a row read from the database unless it was written since begin_read()"""
+        with self._lock:
+            entry = self._entries.get(transaction_id)
+            if entry is not None and entry[1] > read_sequence:
+                self._stale_puts += 1
+                return
+            self._store(transaction_id, row, read_sequence)
+
+    def put(self, transaction_id: str, row: dict) -> str:
+        """Cache a row just written and committed; returns the writer's version token"""
+        with self._lock:
+            self._sequence += 1
+            self._store(transaction_id, row, self._sequence)
+            return f"{self.process_id}.{self._sequence}"
+
+    def invalidate(self, transaction_id: str) -> str:
+        """Drop a row just updated and committed; returns the writer's version token"""
+        with self._lock:
+            self._sequence += 1
+            self._invalidations += 1
+            # The tombstone keeps reads that started before this write from caching the old row
+            self._store(transaction_id, None, self._sequence)
+            return f"{self.process_id}.{self._sequence}"
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+                "bypasses": self._bypasses,
+                "stale_puts": self._stale_puts,
+                "invalidations": self._invalidations,
+                "evictions": self._evictions,
+            }